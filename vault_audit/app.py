@@ -1,16 +1,36 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, Response, stream_with_context
+import hmac
+import json
 import os
+import queue
+from datetime import date, datetime
+from functools import partial, wraps
+from typing import Optional
+from itertools import chain
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from modules.parser.parser import parse_container_file
-from modules.auditor.auditor import VaultAuditor
-from modules.export.exporter import export_audit_results
-from modules.database.db_manager import DatabaseManager
+from modules.parser.parse_cache import ParseCache
+from modules.parser.batch import BatchParser, BatchUploadError, extract_workbooks, MAX_BATCH_FILES
+from modules.models.models import MultiContainerData
+from modules.models.label_index import LabelIndex
+from modules.auditor.auditor import VaultAuditor, ENGINE_AUTO
+from modules.export.jobs import ExportJobQueue, JOB_DONE
+from modules.export.formats import AuditReport, get_exporter
+from modules.export.report_cache import ReportCache
+from modules.database.db_manager import DatabaseManager, encode_bag_cursor, decode_bag_cursor
+from modules.database.models import bag_row_to_dict
+from modules.database.scan_queue import ScanWriteQueue
+from modules.session.store import AuditSession, create_session_store, new_audit_id
+from modules.events.broadcaster import create_broadcaster, format_sse
+from modules.instrumentation.metrics import Metrics
+from modules.instrumentation.profiler import RequestProfiler
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
 app.config['EXPORT_FOLDER'] = os.path.join(os.path.dirname(__file__), 'exports')
+app.config['PARSE_CACHE_FOLDER'] = os.path.join(os.path.dirname(__file__), 'cache', 'parsed')
+app.config['PROFILE_FOLDER'] = os.path.join(os.path.dirname(__file__), 'profiles')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'vault-audit-secret-key-change-in-production')
 
@@ -45,11 +65,113 @@ def load_user(user_id):
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
 
-db_manager = DatabaseManager(os.path.join(os.path.dirname(__file__), 'vault_audit.db'))
-
-container_data = None
-auditor = None
-last_audit_result = None
+def metrics_access(view):
+    """Logged-in users, or scrapers sending VAULT_METRICS_TOKEN as a bearer token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.environ.get('VAULT_METRICS_TOKEN')
+        supplied = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return view(*args, **kwargs)
+        return login_required(view)(*args, **kwargs)
+    return wrapper
+
+# Request, SQL and parse/export timings on /metrics; VAULT_METRICS=0 turns it all off
+metrics = Metrics(enabled=os.environ.get('VAULT_METRICS', '1').lower() not in ('0', 'false', 'no', 'off'))
+metrics.init_app(app, view_decorator=metrics_access)
+
+# On-demand request profiling; only installed when an admin token is configured
+request_profiler = None
+if os.environ.get('VAULT_PROFILE_TOKEN'):
+    request_profiler = RequestProfiler(
+        app.wsgi_app,
+        app.config['PROFILE_FOLDER'],
+        token=os.environ['VAULT_PROFILE_TOKEN'],
+        max_profiles=int(os.environ.get('VAULT_PROFILE_KEEP', 20))
+    )
+    app.wsgi_app = request_profiler
+
+parse_cache = ParseCache(
+    app.config['PARSE_CACHE_FOLDER'],
+    max_memory_entries=int(os.environ.get('VAULT_PARSE_CACHE_ENTRIES', 8)),
+    max_disk_bytes=int(os.environ.get('VAULT_PARSE_CACHE_MB', 256)) * 1024 * 1024
+)
+
+# Process pool for /upload/batch; 0 or unset picks from the CPU count
+batch_parser = BatchParser(max_workers=int(os.environ.get('VAULT_PARSE_WORKERS', 0)) or None)
+
+# Any supported SQLAlchemy URL (SQLite or PostgreSQL); defaults to the local SQLite file
+db_manager = DatabaseManager(
+    os.environ.get('VAULT_DATABASE_URL') or os.path.join(os.path.dirname(__file__), 'vault_audit.db'),
+    aged_days=int(os.environ.get('VAULT_AGED_DAYS', 3)),
+    storage_profile=os.environ.get('VAULT_DB_PROFILE', 'wal')
+)
+metrics.instrument_engine(db_manager.engine)
+
+# Optional write-behind queue for /audit scans: VAULT_SCAN_QUEUE=async acknowledges
+# once queued, sync once committed; unset writes inline as before
+scan_queue = None
+if os.environ.get('VAULT_SCAN_QUEUE'):
+    scan_queue = ScanWriteQueue(
+        db_manager,
+        durability=os.environ['VAULT_SCAN_QUEUE'],
+        flush_interval=int(os.environ.get('VAULT_SCAN_QUEUE_INTERVAL_MS', 50)) / 1000,
+        max_batch=int(os.environ.get('VAULT_SCAN_QUEUE_BATCH', 1000)),
+        # Acknowledged scans that still fail after the retries, replayed on the next start
+        failed_path=os.environ.get('VAULT_SCAN_QUEUE_FAILED_PATH')
+        or os.path.join(os.path.dirname(__file__), 'failed_scans.jsonl')
+    )
+
+# Audit engine for bulk audits: auto (the set engine unless
+# VAULT_AUDIT_NUMPY_MIN_LABELS is set), python, or numpy (needs numpy)
+new_auditor = partial(
+    VaultAuditor,
+    engine=os.environ.get('VAULT_AUDIT_ENGINE', ENGINE_AUTO),
+    vectorized_min_labels=int(os.environ['VAULT_AUDIT_NUMPY_MIN_LABELS'])
+    if os.environ.get('VAULT_AUDIT_NUMPY_MIN_LABELS') else None
+)
+
+# Parsed container, auditor and last result live per audit, not per process, so
+# any worker can serve /audit and /export (use sqlite:// or redis:// for gunicorn)
+session_store_url = os.environ.get('VAULT_SESSION_STORE', 'memory://')
+session_store = create_session_store(
+    session_store_url,
+    ttl_seconds=int(os.environ.get('VAULT_SESSION_TTL', 12 * 60 * 60)),
+    auditor_factory=new_auditor
+)
+
+# Background report rendering for POST /export
+export_jobs = ExportJobQueue(
+    app.config['EXPORT_FOLDER'],
+    max_workers=int(os.environ.get('VAULT_EXPORT_WORKERS', 2)),
+    retention_seconds=int(os.environ.get('VAULT_EXPORT_RETENTION', 60 * 60)),
+    on_rendered=partial(metrics.observe, 'run_export_job')
+)
+
+# Rendered workbooks for repeat GET /export clicks; also prunes exports/
+report_cache = ReportCache(
+    max_bytes=int(os.environ.get('VAULT_REPORT_CACHE_MB', 64)) * 1024 * 1024,
+    export_folder=app.config['EXPORT_FOLDER'],
+    max_export_files=int(os.environ.get('VAULT_EXPORT_KEEP_FILES', 200))
+)
+
+# Live audit progress for /audit/<id>/events subscribers; each open stream holds
+# a request thread. None when the session store can't relay events between workers
+broadcaster = create_broadcaster(
+    session_store_url,
+    max_subscribers=int(os.environ.get('VAULT_SSE_MAX_SUBSCRIBERS', 32))
+)
+SSE_KEEPALIVE_SECONDS = 15
+
+def requested_audit_id():
+    """The audit named in the request body/query, or the user's last upload"""
+    payload = request.get_json(silent=True) or {}
+    return payload.get('audit_id') or request.args.get('audit_id') or session.get('audit_id')
+
+def get_audit_session(audit_id=None):
+    """Look up the audit from the URL, request body/query, or the user's last upload"""
+    audit_id = audit_id or requested_audit_id()
+    return session_store.get(audit_id) if audit_id else None
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -87,8 +209,6 @@ def index():
 @app.route('/upload', methods=['POST'])
 @login_required
 def upload_file():
-    global container_data, auditor
-
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
 
@@ -102,125 +222,542 @@ def upload_file():
 
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
+    file_bytes = file.read()
+    with open(filepath, 'wb') as f:
+        f.write(file_bytes)
 
     try:
-        container_data = parse_container_file(filepath)
-        auditor = VaultAuditor(container_data)
+        # Re-uploads of the same workbook skip openpyxl entirely
+        digest = ParseCache.hash_bytes(file_bytes)
+        container_data = parse_cache.get(digest)
+        if container_data is None:
+            with metrics.timer('BatchParser.parse_workbook'):
+                container_data = batch_parser.parse_workbook(filepath)
+            parse_cache.put(digest, container_data)
+
+        audit_session = AuditSession(
+            audit_id=new_audit_id(),
+            container_data=container_data,
+            auditor=new_auditor(container_data)
+        )
+        session_store.put(audit_session)
+        session['audit_id'] = audit_session.audit_id
 
         response_data = {
             'success': True,
-            'location': container_data.location_name,
-            'created_at': container_data.parameters.created_at,
-            'created_by': container_data.parameters.created_by,
-            'carrier': container_data.parameters.carrier,
-            'carrier_location': container_data.parameters.carrier_location,
-            'total_valid_labels': len(container_data.valid_labels),
-            'valid_labels': sorted(list(container_data.valid_labels))
+            'audit_id': audit_session.audit_id,
+            **container_summary(container_data),
+            'valid_labels': container_data.valid_labels.sorted_labels
         }
+        if isinstance(container_data, MultiContainerData):
+            response_data['containers'] = [container_summary(container) for container in container_data.containers]
 
         return jsonify(response_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def container_summary(container_data):
+    """Upload response fields describing a parsed holdover file"""
+    containers = container_data.containers
+    parameters = containers[0].parameters
+    return {
+        'location': container_data.location_name,
+        'created_at': parameters.created_at,
+        'created_by': parameters.created_by,
+        'carrier': parameters.carrier,
+        'carrier_location': ', '.join(dict.fromkeys(container.parameters.carrier_location for container in containers)),
+        'total_valid_labels': len(container_data.valid_labels)
+    }
+
+@app.route('/upload/batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """Parse many holdover files (or zips of them) into one multi-location audit"""
+    workbooks = []
+    try:
+        for file in request.files.getlist('files'):
+            if file.filename.endswith('.zip'):
+                with metrics.timer('extract_workbooks'):
+                    workbooks.extend(extract_workbooks(file.read()))
+            elif file.filename.endswith('.xlsx'):
+                workbooks.append((file.filename, file.read()))
+            else:
+                return jsonify({'error': f'Only .xlsx and .zip files are allowed: {file.filename}'}), 400
+    except BatchUploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not workbooks:
+        return jsonify({'error': 'No files uploaded'}), 400
+    if len(workbooks) > MAX_BATCH_FILES:
+        return jsonify({'error': f'At most {MAX_BATCH_FILES} workbooks per upload'}), 400
+
+    try:
+        # Cached files are reused; the rest are parsed in parallel
+        parsed = {}
+        to_parse = []
+        for index, (name, file_bytes) in enumerate(workbooks):
+            digest = ParseCache.hash_bytes(file_bytes)
+            container_data = parse_cache.get(digest)
+            if container_data is not None:
+                parsed[index] = container_data
+                continue
+
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{digest[:16]}_{secure_filename(name)}")
+            with open(filepath, 'wb') as f:
+                f.write(file_bytes)
+            to_parse.append((index, digest, filepath))
+
+        errors = []
+        if to_parse:
+            try:
+                with metrics.timer('BatchParser.parse_files'):
+                    results = batch_parser.parse_files([filepath for _, _, filepath in to_parse])
+            finally:
+                # The files only hand the workbooks to the parser processes
+                for _, _, filepath in to_parse:
+                    try:
+                        os.remove(filepath)
+                    except OSError:
+                        pass
+            for (index, digest, _), result in zip(to_parse, results):
+                if isinstance(result, Exception):
+                    errors.append({'file': workbooks[index][0], 'error': str(result)})
+                else:
+                    parse_cache.put(digest, result)
+                    parsed[index] = result
+
+        if not parsed:
+            return jsonify({'error': 'No workbook could be parsed', 'errors': errors}), 400
+
+        # Multi-location workbooks contribute one container per location sheet
+        containers = [container for index in sorted(parsed) for container in parsed[index].containers]
+        container_data = MultiContainerData(containers)
+
+        audit_session = AuditSession(
+            audit_id=new_audit_id(),
+            container_data=container_data,
+            auditor=new_auditor(container_data)
+        )
+        session_store.put(audit_session)
+        session['audit_id'] = audit_session.audit_id
+
+        return jsonify({
+            'success': True,
+            'audit_id': audit_session.audit_id,
+            'location': container_data.location_name,
+            'containers': [
+                {'file': workbooks[index][0], **container_summary(container)}
+                for index in sorted(parsed) for container in parsed[index].containers
+            ],
+            'errors': errors,
+            'total_valid_labels': len(container_data.valid_labels),
+            'valid_labels': container_data.valid_labels.sorted_labels
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/upload/cache', methods=['GET'])
+@login_required
+def upload_cache_stats():
+    return jsonify(parse_cache.stats())
+
 @app.route('/audit', methods=['POST'])
 @login_required
 def audit():
-    global auditor, last_audit_result
+    audit_id = requested_audit_id()
+    data = request.get_json(silent=True) or {}
 
-    if not auditor:
-        return jsonify({'error': 'Please upload a container file first'}), 400
+    # A posted list is the complete scan list (the UI edits it locally) and
+    # replaces the running state; without one, the scans sent through
+    # /audit/<id>/scan are finalized
+    completed = session_store.complete(audit_id, data.get('scanned_labels')) if audit_id else None
 
-    data = request.json
-    scanned_labels = data.get('scanned_labels', [])
+    if not completed:
+        return jsonify({'error': 'Please upload a container file first'}), 400
 
-    result = auditor.audit(scanned_labels)
+    audit_session, result, pending_scans = completed
+    container_data = audit_session.container_data
+    auditor = audit_session.auditor
     summary = auditor.get_summary(result)
 
-    last_audit_result = result
+    if broadcaster:
+        broadcaster.publish(audit_session.audit_id, 'finalized', {'counters': summary})
 
     # Record import to database (only when Complete Audit is pressed)
-    import_stats = None
-    try:
-        import_stats = db_manager.record_import(
-            import_date=container_data.parameters.created_at_date,
-            carrier_location=container_data.parameters.carrier_location,
-            valid_labels=list(container_data.valid_labels)
-        )
-    except Exception as import_error:
-        print(f"Error recording import: {import_error}")
-
-    # Record scanned labels to database
-    bag_records = {}
-    for label in scanned_labels:
-        if label.strip():
+    import_stats = {}
+    for carrier_location, imports in imports_by_location(container_data).items():
+        location_imports = []
+        for import_date, labels in imports:
             try:
-                record = db_manager.record_scan(label.strip(), container_data.parameters.carrier_location)
-                bag_records[label.strip()] = record
-            except Exception as e:
-                print(f"Error recording scan for {label}: {e}")
+                location_imports.append(db_manager.record_import(
+                    import_date=import_date,
+                    carrier_location=carrier_location,
+                    valid_labels=list(labels)
+                ))
+            except Exception as import_error:
+                print(f"Error recording import: {import_error}")
+        if location_imports:
+            import_stats[carrier_location] = combine_import_stats(location_imports)
+            import_stats[carrier_location]['total_labels'] = len(LabelIndex.union_of(labels for _, labels in imports))
+
+    # Record scanned labels to database in a single transaction per location
+    bag_records = {}
+    scans_queued = 0
+    for carrier_location, labels in scans_by_location(container_data, pending_scans).items():
+        try:
+            if scan_queue:
+                ticket = scan_queue.submit(labels, carrier_location)
+                if ticket.done:
+                    bag_records.update(ticket.results or {})
+                else:
+                    scans_queued += len(ticket.labels)
+            else:
+                bag_records.update(db_manager.record_scans(labels, carrier_location))
+        except Exception as e:
+            print(f"Error recording scans: {e}")
 
     # Get location tracking stats
-    location_stats = db_manager.get_location_stats(container_data.parameters.carrier_location)
+    location_stats = {
+        carrier_location: db_manager.get_location_stats(carrier_location)
+        for carrier_location in containers_by_location(container_data)
+    }
+
+    # One location keeps the original flat fields; several are combined for
+    # the UI, with each location's own figures under 'locations'
+    location_stats = combine_location_stats(location_stats)
+    import_stats = combine_import_stats(list(import_stats.values()), import_stats) if import_stats else None
 
     return jsonify({
         'summary': summary,
-        'matched_labels': sorted(list(result.matched_labels)),
-        'unmatched_labels': sorted(list(result.unmatched_labels)),
-        'expected_not_scanned': sorted(list(result.expected_not_scanned)),
+        'matched_labels': result.matched_labels.sorted_labels,
+        'unmatched_labels': result.unmatched_labels.sorted_labels,
+        'expected_not_scanned': result.expected_not_scanned.sorted_labels,
+        'location_breakdown': auditor.get_location_breakdown(result),
         'bag_records': bag_records,
+        'scans_queued': scans_queued,
         'location_stats': location_stats,
         'import_stats': import_stats
     })
 
-@app.route('/export', methods=['GET'])
+def containers_by_location(container_data) -> dict:
+    """Containers per carrier location in upload order; a batch can hold several files for one location"""
+    grouped = {}
+    for container in container_data.containers:
+        grouped.setdefault(container.parameters.carrier_location, []).append(container)
+    return grouped
+
+def imports_by_location(container_data) -> dict:
+    """
+    The imports to record per carrier location, oldest first.
+
+    Files for the same location and day are one import of their combined
+    labels, so a label is never counted twice for one day.
+
+    Returns:
+        dict mapping carrier_location to a list of (import_date, LabelIndex)
+    """
+    imports = {}
+    for carrier_location, containers in containers_by_location(container_data).items():
+        by_date = {}
+        for container in containers:
+            by_date.setdefault(container.parameters.created_at_date, []).append(container.valid_labels)
+        imports[carrier_location] = [(import_date, LabelIndex.union_of(by_date[import_date]))
+                                     for import_date in sorted(by_date)]
+    return imports
+
+def combine_import_stats(stats: list[dict], locations: dict = None) -> dict:
+    """
+    Several record_import results as one.
+
+    An aged label reported by more than one import of its location is
+    listed once, with the figures of the latest import.
+
+    Args:
+        locations: Per-location results to keep under 'locations'
+    """
+    if len(stats) == 1 and not (locations and len(locations) > 1):
+        return stats[0]
+
+    labels_over_3_days = {}
+    for entry in stats:
+        for label in entry['labels_over_3_days']:
+            labels_over_3_days[(entry['carrier_location'], label['label_id'])] = label
+
+    combined = {
+        'success': all(entry['success'] for entry in stats),
+        'import_date': ', '.join(dict.fromkeys(entry['import_date'] for entry in stats)),
+        'carrier_location': ', '.join(dict.fromkeys(entry['carrier_location'] for entry in stats)),
+        'total_labels': sum(entry['total_labels'] for entry in stats),
+        'new_labels_count': sum(entry['new_labels_count'] for entry in stats),
+        'updated_labels_count': sum(entry['updated_labels_count'] for entry in stats),
+        'labels_over_3_days': list(labels_over_3_days.values()),
+        'labels_over_3_days_count': len(labels_over_3_days)
+    }
+    if locations:
+        combined['locations'] = locations
+    return combined
+
+def combine_location_stats(location_stats: dict) -> Optional[dict]:
+    """
+    Location trackers by carrier location as one tracker for the UI.
+
+    A single location is returned as is; several are summed, spanning
+    the earliest to the latest scan, with each under 'locations'.
+    """
+    if len(location_stats) == 1:
+        return next(iter(location_stats.values()))
+
+    trackers = [tracker for tracker in location_stats.values() if tracker]
+    if not trackers:
+        return None
+
+    scan_dates = [datetime.strptime(value, "%m/%d/%y") for tracker in trackers
+                  for value in (tracker['first_scan_date'], tracker['last_scan_date']) if value]
+    return {
+        'carrier_location': ', '.join(location_stats),
+        'first_scan_date': min(scan_dates).strftime("%m/%d/%y") if scan_dates else None,
+        'last_scan_date': max(scan_dates).strftime("%m/%d/%y") if scan_dates else None,
+        'total_days_tracked': max(tracker['total_days_tracked'] or 0 for tracker in trackers),
+        'total_unique_bags': sum(tracker['total_unique_bags'] or 0 for tracker in trackers),
+        'total_scans': sum(tracker['total_scans'] or 0 for tracker in trackers),
+        'locations': location_stats
+    }
+
+def scans_by_location(container_data, labels: list[str]) -> dict:
+    """
+    Group scans by the carrier location that expects them, in scan order.
+
+    Labels no container expects are recorded at the first container's location.
+    """
+    default_location = container_data.containers[0].parameters.carrier_location
+    if not isinstance(container_data, MultiContainerData):
+        return {default_location: labels} if labels else {}
+
+    grouped = {}
+    for label in labels:
+        location = container_data.label_locations.get(label.strip(), default_location)
+        grouped.setdefault(location, []).append(label)
+    return grouped
+
+@app.route('/audit/<audit_id>/scan', methods=['POST'])
 @login_required
-def export():
-    global last_audit_result, container_data
+def audit_scan(audit_id):
+    data = request.get_json(silent=True) or {}
+    label = (data.get('label') or '').strip()
 
-    if not last_audit_result:
-        return jsonify({'error': 'No audit results to export'}), 400
+    if not label:
+        return jsonify({'error': 'No label provided'}), 400
 
-    if not container_data:
-        return jsonify({'error': 'No container data available'}), 400
+    # The store classifies and records the scan atomically
+    scanned = session_store.scan(audit_id, label)
 
-    try:
+    if not scanned:
+        return jsonify({'error': 'Audit not found'}), 404
+
+    status, counters = scanned
+    event = {
+        'label': label,
+        'status': status,
+        'counters': counters
+    }
+    if broadcaster:
+        broadcaster.publish(audit_id, 'scan', event)
+
+    return jsonify(event)
+
+@app.route('/audit/<audit_id>/events', methods=['GET'])
+@login_required
+def audit_events(audit_id):
+    if broadcaster is None:
+        return jsonify({'error': 'Live events need VAULT_SESSION_STORE set to memory:// or redis://'}), 501
+
+    # Subscribe before reading the counters so no scan falls in between
+    subscription = broadcaster.subscribe(audit_id)
+
+    if subscription is None:
+        return jsonify({'error': 'Too many live event streams, try again later'}), 503, {'Retry-After': '30'}
+
+    initial_counters = session_store.counters(audit_id)
+
+    if not initial_counters:
+        broadcaster.unsubscribe(audit_id, subscription)
+        return jsonify({'error': 'Audit not found'}), 404
+
+    def stream():
+        try:
+            yield format_sse('counters', initial_counters)
+            while True:
+                try:
+                    event, data = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broadcaster.unsubscribe(audit_id, subscription)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def build_export_args(audit_session):
+    """Collect everything a report exporter needs for an audit session"""
+    container_data = audit_session.container_data
+    containers = container_data.containers
+
+    location_stats = {}
+    labels_over_3_days = []
+    import_durations = {}
+    for carrier_location, imports in imports_by_location(container_data).items():
         # Get location stats for export
-        location_stats = db_manager.get_location_stats(container_data.parameters.carrier_location)
+        location_stats[carrier_location] = db_manager.get_location_stats(carrier_location)
 
-        # Get ALL labels that are >=3 days old (import-based tracking)
-        labels_over_3_days = db_manager.get_labels_over_3_days(container_data.parameters.carrier_location)
+        # Get ALL labels that are >=3 days old (import-based tracking), once per location
+        labels_over_3_days.extend(db_manager.get_labels_over_3_days(carrier_location))
 
         # Get import duration stats for export (replaces scan-based duration)
-        import_durations = db_manager.get_import_duration_stats(
-            label_ids=list(container_data.valid_labels),
-            carrier_location=container_data.parameters.carrier_location
-        )
+        import_durations.update(db_manager.get_import_duration_stats(
+            label_ids=list(LabelIndex.union_of(labels for _, labels in imports)),
+            carrier_location=carrier_location
+        ))
+
+    first = containers[0].parameters
+    container_info = {
+        'location': container_data.location_name,
+        'carrier': first.carrier,
+        'created_at': ', '.join(dict.fromkeys(container.parameters.created_at for container in containers)),
+        'created_by': first.created_by,
+        'location_stats': combine_location_stats(location_stats)
+    }
 
-        container_info = {
-            'location': container_data.location_name,
-            'carrier': container_data.parameters.carrier,
-            'created_at': container_data.parameters.created_at,
-            'created_by': container_data.parameters.created_by,
-            'location_stats': location_stats
-        }
+    return audit_session.last_audit_result, container_info, import_durations, labels_over_3_days
 
-        filepath = export_audit_results(
-            last_audit_result,
-            container_info,
-            app.config['EXPORT_FOLDER'],
-            import_durations,  # Pass import durations instead of bag durations
-            labels_over_3_days  # Pass labels that are >=3 days old
-        )
+@app.route('/export', methods=['GET'])
+@login_required
+def export():
+    audit_session = get_audit_session()
+
+    if not audit_session or not audit_session.last_audit_result:
+        return jsonify({'error': 'No audit results to export'}), 400
 
-        return send_file(
-            filepath,
-            as_attachment=True,
-            download_name=os.path.basename(filepath)
+    exporter = get_exporter(request.args.get('format'))
+    if not exporter:
+        return jsonify({'error': 'Unsupported export format'}), 400
+
+    try:
+        cached = None
+        if exporter.buffered:
+            # Repeat exports of an unchanged audit against an unchanged DB reuse the report
+            container_data = audit_session.container_data
+            cache_key = ReportCache.fingerprint(
+                audit_session.last_audit_result,
+                container_data.location_name,
+                [(container.parameters.carrier_location, container.parameters.created_at)
+                 for container in container_data.containers],
+                db_manager.get_generation(),
+                date.today(),
+                exporter.name
+            )
+            cached = report_cache.get(cache_key)
+
+            if cached is None:
+                report = AuditReport(*build_export_args(audit_session))
+                with metrics.timer(f'{type(exporter).__name__}.iter_chunks'):
+                    cached = (b''.join(exporter.iter_chunks(report)), exporter.download_name())
+                report_cache.put(cache_key, *cached)
+                report_cache.cleanup_exports()
+
+        if cached is not None:
+            data, download_name = cached
+            return Response(data, mimetype=exporter.mimetype,
+                            headers={'Content-Disposition': f'attachment; filename={download_name}'})
+
+        # Streamed formats go straight to the client for scripts and pipelines
+        report = AuditReport(*build_export_args(audit_session))
+        return Response(
+            stream_with_context(exporter.iter_chunks(report)),
+            mimetype=exporter.mimetype,
+            headers={'Content-Disposition': f'attachment; filename={exporter.download_name()}'}
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/export', methods=['POST'])
+@login_required
+def export_async():
+    audit_session = get_audit_session()
+
+    if not audit_session or not audit_session.last_audit_result:
+        return jsonify({'error': 'No audit results to export'}), 400
+
+    try:
+        job_id = export_jobs.submit(*build_export_args(audit_session))
+        if not job_id:
+            return jsonify({'error': 'Too many exports in progress, try again shortly'}), 503
+
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('export_status', job_id=job_id),
+            'download_url': url_for('export_download', job_id=job_id)
+        }), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/export/<job_id>', methods=['GET'])
+@login_required
+def export_status(job_id):
+    job = export_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+
+    job.pop('filepath', None)
+    return jsonify(job)
+
+@app.route('/export/<job_id>/download', methods=['GET'])
+@login_required
+def export_download(job_id):
+    job = export_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+
+    if job['status'] != JOB_DONE:
+        return jsonify(job), 409
+
+    return send_file(
+        job['filepath'],
+        as_attachment=True,
+        download_name=job['download_name']
+    )
+
+@app.route('/health', methods=['GET'])
+def health():
+    queue_stats = scan_queue.stats() if scan_queue else None
+    # Degraded while the scan writer is down or its latest batch failed
+    degraded = queue_stats and (queue_stats['last_error'] or not queue_stats['writer_alive'])
+    return jsonify({
+        'status': 'degraded' if degraded else 'ok',
+        'database': db_manager.dialect,
+        'scan_queue': queue_stats
+    })
+
+@app.route('/profiles', methods=['GET'])
+@login_required
+def list_profiles():
+    if not request_profiler:
+        return jsonify({'error': 'Profiling is not enabled'}), 404
+    return jsonify(request_profiler.list_profiles())
+
+@app.route('/profiles/<name>', methods=['GET'])
+@login_required
+def download_profile(name):
+    path = request_profiler.get_path(name) if request_profiler else None
+    if not path:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, as_attachment=True, download_name=name)
+
 @app.route('/bags/<label_id>', methods=['GET'])
 @login_required
 def get_bag(label_id):
@@ -232,25 +769,56 @@ def get_bag(label_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/bags', methods=['GET'])
-@login_required
-def get_all_bags():
+def stream_bags(carrier_location=None):
+    """
+    Stream a keyset-paginated bag listing as one JSON object.
+
+    Query args: limit (page size, all bags if omitted), cursor (next_cursor
+    of the previous page) and offset (skipped before the first row).
+    """
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', type=int)
+    cursor = request.args.get('cursor')
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    try:
+        after = decode_bag_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
-        limit = request.args.get('limit', type=int)
-        offset = request.args.get('offset', type=int)
-        bags = db_manager.get_all_bags(limit=limit, offset=offset)
-        return jsonify({'bags': bags, 'count': len(bags)})
+        chunks = db_manager.iter_bag_rows(carrier_location=carrier_location, after=after, limit=limit, offset=offset)
+        # Run the first query before the 200 goes out so database errors still get a 500
+        first_chunk = next(chunks, None)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    def generate():
+        location = f'"location": {json.dumps(carrier_location)}, ' if carrier_location is not None else ''
+        yield '{' + location + '"bags": ['
+
+        count = 0
+        last = None
+        for rows in chain([first_chunk] if first_chunk else [], chunks):
+            yield (', ' if count else '') + ', '.join(json.dumps(bag_row_to_dict(row)) for row in rows)
+            count += len(rows)
+            last = rows[-1]
+
+        # A full page may have more behind it; the next page is empty if not
+        next_cursor = encode_bag_cursor(last.first_scan_datetime, last.id) if limit and count == limit else None
+        yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@app.route('/bags', methods=['GET'])
+@login_required
+def get_all_bags():
+    return stream_bags()
+
 @app.route('/bags/location/<location>', methods=['GET'])
 @login_required
 def get_bags_by_location(location):
-    try:
-        bags = db_manager.get_bags_by_location(location)
-        return jsonify({'bags': bags, 'count': len(bags), 'location': location})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return stream_bags(carrier_location=location)
 
 @app.route('/bags/<label_id>', methods=['DELETE'])
 @login_required
@@ -0,0 +1,108 @@
+"""
+Compare the set-based and NumPy audit engines.
+
+Audits synthetic scans (90% of the expected labels, some padded with
+spaces or repeated, plus 5% unknown labels) at each size with both
+engines, checks the AuditResults are identical and reports where NumPy
+starts to win, i.e. a value for VECTORIZED_MIN_LABELS on this host.
+
+Run from the vault_audit directory (needs numpy):
+    python -m benchmarks.bench_audit --sizes 100000,1000000
+"""
+import argparse
+import random
+import time
+
+from modules.auditor.auditor import VaultAuditor, ENGINE_PYTHON, ENGINE_NUMPY
+from modules.auditor.vectorized import numpy_available
+from modules.models.label_index import LabelIndex
+from modules.models.models import ContainerData, Parameters
+
+SCANNED_RATIO = 0.9
+UNMATCHED_RATIO = 0.05
+REPEATED_RATIO = 0.05
+PADDED_RATIO = 0.1
+
+
+def synthetic_audit(labels: int, seed: int = 0) -> tuple[ContainerData, list[str]]:
+    """Expected labels shaped like real 20 digit bag labels and a shuffled scan batch"""
+    rng = random.Random(seed)
+    expected = list({f'{rng.randrange(10 ** 19):020d}' for _ in range(labels)})
+
+    scanned = expected[:int(len(expected) * SCANNED_RATIO)]
+    scanned += rng.sample(scanned, int(len(scanned) * REPEATED_RATIO))
+    scanned += [f'UNKNOWN{i:08d}' for i in range(int(labels * UNMATCHED_RATIO))]
+    scanned = [f' {label} ' if rng.random() < PADDED_RATIO else label for label in scanned]
+    rng.shuffle(scanned)
+
+    container_data = ContainerData(
+        parameters=Parameters(created_at='', created_by='', carrier='', carrier_location='Benchmark'),
+        location_name='Benchmark',
+        valid_labels=LabelIndex(expected),
+        transactions=[]
+    )
+    return container_data, scanned
+
+
+def best_time(fn, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def same_result(a, b) -> bool:
+    return (a.total_scanned == b.total_scanned
+            and a.matched_labels.sorted_labels == b.matched_labels.sorted_labels
+            and a.unmatched_labels.sorted_labels == b.unmatched_labels.sorted_labels
+            and a.expected_not_scanned.sorted_labels == b.expected_not_scanned.sorted_labels)
+
+
+def run(labels: int, repeat: int) -> dict:
+    container_data, scanned = synthetic_audit(labels)
+    python_seconds, python_result = best_time(
+        lambda: VaultAuditor(container_data, engine=ENGINE_PYTHON).audit(scanned), repeat)
+    numpy_seconds, numpy_result = best_time(
+        lambda: VaultAuditor(container_data, engine=ENGINE_NUMPY).audit(scanned), repeat)
+
+    return {
+        'labels': labels,
+        'scans': len(scanned),
+        'python_seconds': python_seconds,
+        'numpy_seconds': numpy_seconds,
+        'speedup': python_seconds / numpy_seconds if numpy_seconds else float('inf'),
+        'identical': same_result(python_result, numpy_result)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated expected label counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not numpy_available():
+        parser.error("numpy is not installed (pip install numpy)")
+
+    crossover = None
+    for size in [int(size) for size in args.sizes.split(',') if size]:
+        result = run(size, args.repeat)
+        print(f"{result['labels']:>9} labels / {result['scans']:>9} scans: "
+              f"python {result['python_seconds']:.3f}s  numpy {result['numpy_seconds']:.3f}s  "
+              f"x{result['speedup']:.2f}  {'identical' if result['identical'] else 'MISMATCH'}")
+        if not result['identical']:
+            raise SystemExit(1)
+        if crossover is None and result['speedup'] > 1:
+            crossover = result['labels'] + result['scans']
+
+    if crossover is None:
+        print("The set engine was faster at every size; leave VECTORIZED_MIN_LABELS unset")
+    else:
+        print(f"NumPy wins from about {crossover:,} expected + scanned labels (VECTORIZED_MIN_LABELS)")
+
+
+if __name__ == '__main__':
+    main()
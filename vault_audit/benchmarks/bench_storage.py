@@ -0,0 +1,109 @@
+"""
+Commit throughput of record_scan under each SQLite storage profile.
+
+Every profile gets a fresh temp database. Scans are recorded one commit
+at a time, first from a single thread and then from --threads writer
+threads while a reader thread polls get_stats, the way concurrent
+scanners and the bags pages share a gunicorn worker.
+
+Run from the vault_audit directory:
+    python -m benchmarks.bench_storage --scans 2000 --threads 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from modules.database.db_manager import DatabaseManager, STORAGE_PROFILES
+
+LOCATION = 'Sioux Falls'
+
+
+def sequential_scans(db: DatabaseManager, scans: int) -> float:
+    start = time.perf_counter()
+    for i in range(scans):
+        db.record_scan(f'SEQ{i:08d}', LOCATION)
+    return time.perf_counter() - start
+
+
+def concurrent_scans(db: DatabaseManager, scans: int, threads: int) -> tuple[float, int]:
+    """Returns (seconds, reads completed) with scans split across writer threads"""
+    per_thread = scans // threads
+    done = threading.Event()
+    reads = [0]
+
+    def writer(thread_no):
+        for i in range(per_thread):
+            db.record_scan(f'T{thread_no}-{i:08d}', LOCATION)
+        db.Session.remove()
+
+    def reader():
+        while not done.is_set():
+            db.get_stats()
+            reads[0] += 1
+        db.Session.remove()
+
+    # The location tracker row already exists on a live vault floor
+    db.record_scan('SEED', LOCATION)
+
+    reader_thread = threading.Thread(target=reader)
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+
+    start = time.perf_counter()
+    reader_thread.start()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    reader_thread.join()
+    return elapsed, reads[0]
+
+
+def run(profiles, scans: int, threads: int) -> list[dict]:
+    results = []
+    for profile in profiles:
+        workdir = tempfile.mkdtemp(prefix='vault_storage_')
+        try:
+            db = DatabaseManager(os.path.join(workdir, 'sequential.db'), storage_profile=profile)
+            sequential = sequential_scans(db, scans)
+            db.engine.dispose()
+
+            db = DatabaseManager(os.path.join(workdir, 'concurrent.db'), storage_profile=profile)
+            concurrent, reads = concurrent_scans(db, scans, threads)
+            db.engine.dispose()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        results.append({
+            'profile': profile,
+            'sequential_commits_per_second': scans / sequential,
+            'concurrent_commits_per_second': (scans // threads * threads) / concurrent,
+            'concurrent_reads_per_second': reads / concurrent
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scans', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--profiles', default=','.join(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    results = run([p for p in args.profiles.split(',') if p], args.scans, args.threads)
+    baseline = next((r for r in results if r['profile'] == 'legacy'), results[0])
+
+    print(f"{'profile':<10} {'commits/s':>10} {'x legacy':>9} {'threaded commits/s':>19} {'reads/s':>9}")
+    for result in results:
+        speedup = result['sequential_commits_per_second'] / baseline['sequential_commits_per_second']
+        print(f"{result['profile']:<10} {result['sequential_commits_per_second']:>10,.0f} {speedup:>8.1f}x "
+              f"{result['concurrent_commits_per_second']:>19,.0f} {result['concurrent_reads_per_second']:>9,.0f}")
+
+
+if __name__ == '__main__':
+    main()
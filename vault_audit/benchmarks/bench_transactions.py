@@ -0,0 +1,66 @@
+"""
+Micro-benchmark for the transaction builder in the parser.
+
+Feeds synthetic location-sheet rows straight into iter_transactions so
+openpyxl is out of the picture. With the old per-row label copy the time
+per label grew with transaction size; it should now stay flat.
+
+Run from the vault_audit directory:
+    python -m benchmarks.bench_transactions --labels-per-transaction 500
+"""
+import argparse
+import time
+
+from modules.parser.parser import iter_transactions
+
+
+def synthetic_rows(transactions: int, labels_per_transaction: int):
+    """Yield rows shaped like a location sheet: date separator, primary row, label rows"""
+    label_no = 0
+    for t in range(transactions):
+        if t % 50 == 0:
+            yield ('2025-09-24 Wednesday', None, None, None, None, None, None, None)
+        yield ('BANK : Origin Vault', 'STORE : Destination', 'Cash bag',
+               '2025-09-23', '2025-09-24', f'LBL{label_no:09d}', 1, 100.0)
+        label_no += 1
+        for _ in range(labels_per_transaction - 1):
+            yield ('', '', '', '', '', f'LBL{label_no:09d}', 1, 100.0)
+            label_no += 1
+
+
+def run(transactions: int, labels_per_transaction: int, repeat: int) -> dict:
+    rows = list(synthetic_rows(transactions, labels_per_transaction))
+    timings = []
+    for _ in range(repeat):
+        valid_labels = set()
+        start = time.perf_counter()
+        parsed = sum(1 for _ in iter_transactions(rows, valid_labels))
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    total_labels = transactions * labels_per_transaction
+    return {
+        'transactions': parsed,
+        'labels_per_transaction': labels_per_transaction,
+        'rows': len(rows),
+        'best_seconds': best,
+        'labels_per_second': total_labels / best if best else float('inf'),
+        'us_per_label': best / total_labels * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transactions', type=int, default=200)
+    parser.add_argument('--labels-per-transaction', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args.transactions, args.labels_per_transaction, args.repeat)
+    print(f"{result['transactions']} transactions x {result['labels_per_transaction']} labels "
+          f"({result['rows']} rows): {result['best_seconds']:.3f}s, "
+          f"{result['labels_per_second']:,.0f} labels/s, {result['us_per_label']:.2f} us/label")
+
+
+if __name__ == '__main__':
+    main()
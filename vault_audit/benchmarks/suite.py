@@ -0,0 +1,263 @@
+"""
+Benchmark suite for the parse, audit, import, scan and export hot paths.
+
+Each stage runs against synthetic holdover workbooks (see workbook.py)
+and temp SQLite files. Timings are the best of --repeat runs; peak
+memory comes from one extra run under tracemalloc, so tracing never
+skews the timings. Results are written as JSON that --compare can diff
+against an earlier run.
+
+Run from the vault_audit directory:
+    python -m benchmarks.suite --sizes 1000,10000
+    python -m benchmarks.suite --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from modules.parser.parser import parse_container_file
+from modules.auditor.auditor import VaultAuditor
+from modules.database.db_manager import DatabaseManager
+from modules.export.exporter import export_audit_results
+from benchmarks.workbook import generate_container_workbook
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEAT = 3
+RESULTS_FOLDER = os.path.join(os.path.dirname(__file__), 'results')
+
+# Share of expected labels scanned, and of extra labels that match nothing
+SCANNED_RATIO = 0.9
+UNMATCHED_RATIO = 0.05
+
+
+def measure(fn, setup=None, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Time fn(*setup()) repeat times, then once more under tracemalloc.
+
+    setup runs outside the timed region and returns the positional
+    arguments for fn.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'best_seconds': min(timings),
+        'mean_seconds': statistics.mean(timings),
+        'peak_memory_bytes': peak
+    }
+
+
+class SizeBenchmarks:
+    """All stages for one workbook size, sharing a scratch directory"""
+
+    def __init__(self, labels: int, workdir: str, scan_sample: int, repeat: int = DEFAULT_REPEAT):
+        self.labels = labels
+        self.workdir = workdir
+        self.scan_sample = scan_sample
+        self.repeat = repeat
+        self.workbook_path = os.path.join(workdir, f'holdover_{labels}.xlsx')
+        self.valid_labels = generate_container_workbook(self.workbook_path, labels)
+
+        self.container_data = parse_container_file(self.workbook_path)
+        self.location = self.container_data.parameters.carrier_location
+
+        scanned_count = int(labels * SCANNED_RATIO)
+        self.scanned = self.valid_labels[:scanned_count] + [
+            f'UNKNOWN{i:08d}' for i in range(int(labels * UNMATCHED_RATIO))
+        ]
+        self._db_count = 0
+
+    def fresh_db(self) -> DatabaseManager:
+        self._db_count += 1
+        return DatabaseManager(os.path.join(self.workdir, f'bench_{self.labels}_{self._db_count}.db'))
+
+    def measure(self, fn, setup=None) -> dict:
+        return measure(fn, setup, repeat=self.repeat)
+
+    def bench_parse(self):
+        return self.measure(parse_container_file, lambda: (self.workbook_path,)), self.labels
+
+    def bench_audit(self):
+        auditor = VaultAuditor(self.container_data)
+        return self.measure(auditor.audit, lambda: (self.scanned,)), len(self.scanned)
+
+    def bench_record_import(self):
+        import_date = date.today()
+        return self.measure(
+            lambda db: db.record_import(import_date, self.location, self.valid_labels),
+            lambda: (self.fresh_db(),)
+        ), self.labels
+
+    def bench_record_reimport(self):
+        # A second day's file for labels already in the history table
+        def setup():
+            db = self.fresh_db()
+            db.record_import(date.today() - timedelta(days=5), self.location, self.valid_labels)
+            return (db,)
+
+        return self.measure(
+            lambda db: db.record_import(date.today(), self.location, self.valid_labels),
+            setup
+        ), self.labels
+
+    def bench_record_scans(self):
+        return self.measure(
+            lambda db: db.record_scans(self.scanned, self.location),
+            lambda: (self.fresh_db(),)
+        ), len(self.scanned)
+
+    def bench_record_scan(self):
+        # One commit per label, so only a sample is timed
+        sample = self.scanned[:self.scan_sample]
+
+        def scan_all(db):
+            for label in sample:
+                db.record_scan(label, self.location)
+
+        return self.measure(scan_all, lambda: (self.fresh_db(),)), len(sample)
+
+    def bench_export(self):
+        db = self.fresh_db()
+        db.record_import(date.today() - timedelta(days=5), self.location, self.valid_labels)
+        labels_over_3_days = db.get_labels_over_3_days(self.location)
+
+        audit_result = VaultAuditor(self.container_data).audit(self.scanned)
+        container_info = {
+            'location': self.container_data.location_name,
+            'created_at': self.container_data.parameters.created_at
+        }
+        output_folder = os.path.join(self.workdir, 'exports')
+
+        return self.measure(
+            lambda: export_audit_results(audit_result, container_info, output_folder,
+                                         labels_over_3_days=labels_over_3_days,
+                                         filename=f'bench_{self.labels}.xlsx')
+        ), self.labels
+
+
+BENCHMARKS = ('parse', 'audit', 'record_import', 'record_reimport', 'record_scans', 'record_scan', 'export')
+
+
+def run(sizes, benchmarks, scan_sample: int, repeat: int = DEFAULT_REPEAT) -> dict:
+    results = []
+    for labels in sizes:
+        workdir = tempfile.mkdtemp(prefix='vault_bench_')
+        try:
+            suite = SizeBenchmarks(labels, workdir, scan_sample, repeat)
+            for name in benchmarks:
+                timing, items = getattr(suite, f'bench_{name}')()
+                result = {
+                    'benchmark': name,
+                    'labels': labels,
+                    'items': items,
+                    **timing,
+                    'items_per_second': items / timing['best_seconds'] if timing['best_seconds'] else None
+                }
+                results.append(result)
+                print(f"{name:<16} {labels:>8} labels  {timing['best_seconds']:8.3f}s  "
+                      f"{result['items_per_second']:>12,.0f} items/s  "
+                      f"{timing['peak_memory_bytes'] / 1024 / 1024:8.1f} MiB peak")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scan_sample': scan_sample,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Return a line per benchmark that got slower than baseline by more than threshold.
+
+    Args:
+        threshold: Allowed slowdown as a fraction (0.2 = 20%)
+    """
+    previous = {(r['benchmark'], r['labels']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['benchmark'], result['labels']))
+        if not before:
+            continue
+        ratio = result['best_seconds'] / before['best_seconds'] if before['best_seconds'] else 1.0
+        memory_ratio = (result['peak_memory_bytes'] / before['peak_memory_bytes']
+                        if before['peak_memory_bytes'] else 1.0)
+        line = (f"{result['benchmark']:<16} {result['labels']:>8} labels  "
+                f"time x{ratio:.2f}  memory x{memory_ratio:.2f}")
+        print(line)
+        if ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma separated label counts')
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help='Comma separated benchmarks to run')
+    parser.add_argument('--scan-sample', type=int, default=200,
+                        help='Labels timed through the one-commit-per-scan record_scan')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Timed runs per benchmark; the best is reported')
+    parser.add_argument('--output', help='JSON results path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Slowdown fraction reported as a regression')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    benchmarks = [name for name in args.only.split(',') if name]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    current = run(sizes, benchmarks, args.scan_sample, args.repeat)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_FOLDER, exist_ok=True)
+        output = os.path.join(RESULTS_FOLDER, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
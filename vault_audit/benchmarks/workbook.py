@@ -0,0 +1,83 @@
+"""
+Synthetic container holdover workbooks for the benchmarks.
+
+The layout mirrors container-holdover.xlsx: a Parameters sheet, one
+location sheet of transactions split by date separator rows (with
+filtered "Bags"/"Boxes" summary labels mixed in), and a trailing
+valid_labels sheet.
+"""
+import random
+from datetime import datetime, timedelta
+
+import openpyxl
+
+HEADER = ('Origin', 'Destination', 'Type', 'Departure date', 'Arrival date', 'Labels', 'Count', 'Value (USD)')
+TRANSACTION_TYPES = ('Cash bag', 'Superbag', 'Bulk coin')
+LOCATION = 'Sioux Falls'
+
+
+def label_for(index: int) -> str:
+    return f'DG{index:08d}'
+
+
+def generate_container_workbook(path: str, labels: int, labels_per_transaction: int = 4,
+                                transactions_per_day: int = 50, location: str = LOCATION,
+                                seed: int = 0) -> list[str]:
+    """
+    Write a holdover workbook with the given number of valid labels.
+
+    Args:
+        path: Where to save the .xlsx
+        labels: Number of distinct valid labels
+        labels_per_transaction: Labels per transaction (the last one may be shorter)
+        transactions_per_day: Transactions between date separator rows
+        location: Location sheet name and carrier location
+        seed: Seed for the random counts and values
+
+    Returns:
+        The valid labels in sheet order
+    """
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+
+    params = wb.create_sheet('Parameters')
+    params.append(['Created at:', '2025-09-24 09:52 AM CDT'])
+    params.append(['Created by:', 'bench@example.com'])
+    params.append(['Carrier:', 'Rochester Armored Car'])
+    params.append(['Carrier location:', f'Rochester Armored Car : {location}'])
+
+    sheet = wb.create_sheet(location)
+    sheet.append(HEADER)
+
+    start_day = datetime(2025, 9, 24)
+    valid_labels = []
+    for transaction in range(-(-labels // labels_per_transaction)):
+        if transaction % transactions_per_day == 0:
+            day = start_day - timedelta(days=transaction // transactions_per_day)
+            sheet.append([day.strftime('%Y-%m-%d %A')])
+
+        departure = (start_day - timedelta(days=1)).strftime('%Y-%m-%d')
+        arrival = start_day.strftime('%Y-%m-%d')
+        first = transaction * labels_per_transaction
+        batch = [label_for(i) for i in range(first, min(first + labels_per_transaction, labels))]
+        valid_labels.extend(batch)
+
+        for position, label in enumerate(batch):
+            value = round(rng.uniform(25, 900000), 2)
+            if position == 0:
+                sheet.append([f'BANK {transaction % 7} : Origin Vault', f'STORE {transaction % 13} : Destination',
+                              TRANSACTION_TYPES[transaction % len(TRANSACTION_TYPES)], departure, arrival,
+                              label, 1, value])
+            else:
+                sheet.append(['', '', '', '', '', label, 1, value])
+
+        if transaction % 10 == 0:
+            sheet.append(['', '', '', '', '', 'Bags', len(batch), None])
+
+    labels_sheet = wb.create_sheet('valid_labels')
+    labels_sheet.append(HEADER)
+    for label in valid_labels:
+        labels_sheet.append([None, None, None, None, None, label, None, None])
+
+    wb.save(path)
+    return valid_labels
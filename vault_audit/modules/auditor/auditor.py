@@ -1,12 +1,166 @@
-from modules.models.models import ContainerData, AuditResult
+import threading
+from typing import Optional
+
+from modules.models.models import ContainerData, MultiContainerData, AuditResult
+from modules.models.label_index import LabelIndex
+from modules.auditor.vectorized import numpy_available, vectorized_audit
+
+SCAN_MATCHED = 'matched'
+SCAN_UNMATCHED = 'unmatched'
+SCAN_DUPLICATE = 'duplicate'
+
+ENGINE_AUTO = 'auto'
+ENGINE_PYTHON = 'python'
+ENGINE_NUMPY = 'numpy'
+AUDIT_ENGINES = (ENGINE_AUTO, ENGINE_PYTHON, ENGINE_NUMPY)
+
+# Expected plus scanned labels from which the auto engine switches to NumPy.
+# Off by default: converting Python strings to arrays costs more than the set
+# engine's whole audit on CPython 3.11 / NumPy 2.x up to 3M labels. Run
+# benchmarks.bench_audit and set this where NumPy wins on the host.
+VECTORIZED_MIN_LABELS: Optional[int] = None
+
+
+def scan_counters(expected_count: int, scanned_count: int, matched_count: int) -> dict:
+    """Running audit counters from distinct expected, scanned and matched label counts"""
+    return {
+        'total_containers_in_onsite': expected_count,
+        'total_scanned': scanned_count,
+        'matched_count': matched_count,
+        'unmatched_count': scanned_count - matched_count,
+        'not_scanned_count': expected_count - matched_count
+    }
 
 
 class VaultAuditor:
-    def __init__(self, container_data: ContainerData):
+    def __init__(self, container_data: ContainerData | MultiContainerData, engine: str = ENGINE_AUTO,
+                 vectorized_min_labels: Optional[int] = VECTORIZED_MIN_LABELS):
+        if engine not in AUDIT_ENGINES:
+            raise ValueError(f"Unknown audit engine: {engine}")
+        if engine == ENGINE_NUMPY and not numpy_available():
+            raise RuntimeError("The numpy audit engine needs the 'numpy' package (pip install numpy)")
+
         self.container_data = container_data
-        self.expected_labels = container_data.valid_labels
+        self.engine = engine
+        self.vectorized_min_labels = vectorized_min_labels
+        # Shares the parsed index; only wraps plain sets from older pickles
+        self.expected_labels = LabelIndex(container_data.valid_labels)
+        # Scan requests on a threaded server share this auditor
+        self.lock = threading.RLock()
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def reset(self):
+        """Clear the incremental scan state"""
+        with self.lock:
+            self.scanned_labels = set()
+            self.matched_labels = set()
+            self.unmatched_labels = set()
+            # Not-scanned labels are expected_labels minus matched_labels, derived on demand
+            # Every scan (duplicates included) not yet written to the database
+            self.pending_scans = []
+
+    def scan(self, label: str) -> Optional[str]:
+        """
+        Classify one scanned label against the expected labels.
+
+        Returns:
+            SCAN_MATCHED, SCAN_UNMATCHED or SCAN_DUPLICATE, or None for a blank label
+        """
+        label = label.strip()
+        if not label:
+            return None
+
+        with self.lock:
+            self.pending_scans.append(label)
+
+            if label in self.scanned_labels:
+                return SCAN_DUPLICATE
+            self.scanned_labels.add(label)
+
+            if label in self.expected_labels:
+                self.matched_labels.add(label)
+                return SCAN_MATCHED
+
+            self.unmatched_labels.add(label)
+            return SCAN_UNMATCHED
+
+    def finalize(self) -> AuditResult:
+        """Snapshot the accumulated scan state as an AuditResult"""
+        with self.lock:
+            return AuditResult(
+                total_scanned=len(self.scanned_labels),
+                matched_labels=LabelIndex(self.matched_labels),
+                unmatched_labels=LabelIndex(self.unmatched_labels),
+                expected_not_scanned=self.expected_labels.difference(self.matched_labels)
+            )
+
+    def drain_pending_scans(self) -> list[str]:
+        """Return the scans recorded since the last drain and forget them"""
+        with self.lock:
+            pending, self.pending_scans = self.pending_scans, []
+            return pending
+
+    def complete(self, scanned_labels: Optional[list[str]] = None) -> tuple[AuditResult, list[str]]:
+        """
+        Finalize the audit and take its pending scans in one step.
+
+        Args:
+            scanned_labels: The complete scan list, replacing everything scanned
+                            so far (labels removed in the UI drop out); None
+                            finalizes the scans accumulated through scan()
+
+        Returns:
+            (AuditResult, scans not yet written to the database)
+        """
+        with self.lock:
+            if scanned_labels is not None:
+                self.load(scanned_labels)
+            return self.finalize(), self.drain_pending_scans()
+
+    def load(self, scanned_labels: list[str]):
+        """
+        Replace the scan state with scanned_labels, as if each was passed
+        to scan() in order. Large batches use the NumPy engine when selected.
+        """
+        with self.lock:
+            self.reset()
+            if self.select_engine(len(scanned_labels)) != ENGINE_NUMPY:
+                for label in scanned_labels:
+                    self.scan(label)
+                return
+
+            result = vectorized_audit(self.expected_labels, scanned_labels)
+            self.matched_labels = set(result.matched_labels)
+            self.unmatched_labels = set(result.unmatched_labels)
+            self.scanned_labels = self.matched_labels | self.unmatched_labels
+            self.pending_scans = [label for label in (label.strip() for label in scanned_labels) if label]
+
+    def get_counters(self) -> dict:
+        with self.lock:
+            return scan_counters(len(self.expected_labels), len(self.scanned_labels), len(self.matched_labels))
+
+    def select_engine(self, scanned_count: int) -> str:
+        """The engine a batch of scanned_count labels is audited with"""
+        if self.engine != ENGINE_AUTO:
+            return self.engine
+        if self.vectorized_min_labels is not None and numpy_available() \
+                and len(self.expected_labels) + scanned_count >= self.vectorized_min_labels:
+            return ENGINE_NUMPY
+        return ENGINE_PYTHON
 
     def audit(self, scanned_labels: list[str]) -> AuditResult:
+        if self.select_engine(len(scanned_labels)) == ENGINE_NUMPY:
+            return vectorized_audit(self.expected_labels, scanned_labels)
+
         scanned_set = set(label.strip() for label in scanned_labels if label.strip())
 
         matched = scanned_set & self.expected_labels
@@ -20,6 +174,41 @@ class VaultAuditor:
             expected_not_scanned=not_scanned
         )
 
+    def get_location_breakdown(self, audit_result: AuditResult) -> dict:
+        """
+        Split an audit result by carrier location.
+
+        A label expected at several locations counts at each of them.
+        Unmatched labels belong to no location and are only in the summary.
+
+        Returns:
+            dict mapping carrier_location to its counts and labels
+        """
+        breakdown = {}
+        for container in self.container_data.containers:
+            expected = container.valid_labels
+            matched = expected.intersection(audit_result.matched_labels)
+            not_scanned = expected.intersection(audit_result.expected_not_scanned)
+
+            entry = breakdown.setdefault(container.parameters.carrier_location, {
+                'location_names': [],
+                'total_containers_in_onsite': 0,
+                'matched_labels': LabelIndex(),
+                'expected_not_scanned': LabelIndex()
+            })
+            entry['location_names'].append(container.location_name)
+            entry['matched_labels'] |= matched
+            entry['expected_not_scanned'] |= not_scanned
+
+        for entry in breakdown.values():
+            entry['total_containers_in_onsite'] = len(entry['matched_labels']) + len(entry['expected_not_scanned'])
+            entry['matched_count'] = len(entry['matched_labels'])
+            entry['not_scanned_count'] = len(entry['expected_not_scanned'])
+            entry['matched_labels'] = entry['matched_labels'].sorted_labels
+            entry['expected_not_scanned'] = entry['expected_not_scanned'].sorted_labels
+
+        return breakdown
+
     def get_summary(self, audit_result: AuditResult) -> dict:
         return {
             'total_containers_in_onsite': len(self.expected_labels),
@@ -27,4 +216,4 @@ class VaultAuditor:
             'matched_count': len(audit_result.matched_labels),
             'unmatched_count': len(audit_result.unmatched_labels),
             'not_scanned_count': len(audit_result.expected_not_scanned)
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,81 @@
+"""
+NumPy audit engine for very large label sets.
+
+Labels are encoded as fixed-width unicode arrays. The expected labels
+arrive sorted and unique from LabelIndex, so every scan is located with
+one vectorized binary search (np.searchsorted) instead of a hash probe
+per label from Python, and matched/not-scanned fall out of a mask over
+the expected labels, already sorted and de-duplicated. NumPy compares
+unicode arrays by code point exactly like Python's sorted(), so the
+result is identical to the set-based engine.
+
+NumPy is optional; numpy_available() tells callers whether this engine
+can be used.
+"""
+from operator import itemgetter
+
+from modules.models.models import AuditResult
+from modules.models.label_index import LabelIndex
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pick(labels: tuple, indexes) -> tuple:
+    """labels[i] for each index, reusing the label objects already in the index"""
+    if len(indexes) == 0:
+        return ()
+    if len(indexes) == 1:
+        return (labels[int(indexes[0])],)
+    return itemgetter(*indexes.tolist())(labels)
+
+
+def vectorized_audit(expected_labels: LabelIndex, scanned_labels: list[str]) -> AuditResult:
+    """
+    Audit scans against the expected labels with NumPy array operations.
+
+    Args:
+        expected_labels: Labels expected on site
+        scanned_labels: Raw scans, possibly padded, blank or repeated
+
+    Returns:
+        AuditResult equal to VaultAuditor's set-based audit
+    """
+    import numpy as np
+
+    expected = expected_labels.sorted_labels
+    expected_array = np.array(expected, dtype=str)
+
+    scans = np.array(scanned_labels, dtype=str)
+    strip = np.strings.strip if hasattr(np, 'strings') else np.char.strip
+    scans = strip(scans)
+    # Sorted queries keep the binary searches cache friendly
+    scans = np.sort(scans[scans != ''])
+
+    # Repeated scans land on the same position, so no np.unique pass is needed
+    if len(expected_array):
+        positions = np.searchsorted(expected_array, scans)
+        found = expected_array[np.minimum(positions, len(expected_array) - 1)] == scans
+    else:
+        positions = np.zeros(len(scans), dtype=np.intp)
+        found = np.zeros(len(scans), dtype=bool)
+
+    scanned_mask = np.zeros(len(expected_array), dtype=bool)
+    scanned_mask[positions[found]] = True
+
+    matched = LabelIndex._from_sorted(_pick(expected, np.flatnonzero(scanned_mask)))
+    not_scanned = LabelIndex._from_sorted(_pick(expected, np.flatnonzero(~scanned_mask)))
+    # Unmatched scans are the few left over; dedupe and sort them in Python
+    unmatched = LabelIndex(scans[~found].tolist())
+
+    return AuditResult(
+        total_scanned=len(matched) + len(unmatched),
+        matched_labels=matched,
+        unmatched_labels=unmatched,
+        expected_not_scanned=not_scanned
+    )
@@ -0,0 +1,122 @@
+"""
+Dialect-specific fast paths for the databases DatabaseManager supports.
+
+Both SQLite and PostgreSQL understand INSERT ... ON CONFLICT and
+RETURNING, so upserts are written once against insert_for(). PostgreSQL
+additionally gets COPY-based bulk ingest.
+"""
+import csv
+import io
+import uuid
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+SQLITE = 'sqlite'
+POSTGRESQL = 'postgresql'
+
+INSERTS = {
+    SQLITE: sqlite_insert,
+    POSTGRESQL: postgresql_insert
+}
+SUPPORTED_DIALECTS = tuple(INSERTS)
+
+# PostgreSQL drivers whose cursors expose COPY FROM STDIN
+COPY_DRIVERS = ('psycopg2', 'psycopg')
+
+# Below this many rows a plain executemany beats setting up a COPY
+COPY_MIN_ROWS = 1000
+
+# Written for None in COPY's CSV stream; labels never contain it
+COPY_NULL = '\\N'
+
+
+def insert_for(dialect_name: str):
+    """The insert() construct with on_conflict_* support for a dialect"""
+    try:
+        return INSERTS[dialect_name]
+    except KeyError:
+        raise ValueError(f"Unsupported database dialect: {dialect_name} "
+                         f"(supported: {', '.join(SUPPORTED_DIALECTS)})")
+
+
+def supports_copy(connection) -> bool:
+    return connection.dialect.name == POSTGRESQL and connection.dialect.driver in COPY_DRIVERS
+
+
+def _python_defaults(table, columns: list[str]) -> dict:
+    """Column defaults SQLAlchemy would normally fill in for an INSERT"""
+    defaults = {}
+    for column in table.columns:
+        if column.name in columns or column.default is None or column.primary_key:
+            continue
+        if column.default.is_scalar:
+            defaults[column.name] = column.default.arg
+        elif column.default.is_callable:
+            defaults[column.name] = column.default.arg(None)
+    return defaults
+
+
+def copy_insert_ignore(connection, table, rows: list[dict], conflict_columns: list[str]):
+    """
+    Bulk insert rows through COPY, skipping rows that hit conflict_columns.
+
+    COPY can't resolve conflicts itself, so rows are streamed into a
+    temporary table that is merged with INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING and dropped at commit.
+    """
+    row_columns = list(rows[0])
+    # COPY bypasses SQLAlchemy, so Python-side defaults (created_at...) are added here
+    defaults = _python_defaults(table, row_columns)
+    default_values = list(defaults.values())
+    column_list = ', '.join(row_columns + list(defaults))
+
+    staging = f"{table.name}_ingest_{uuid.uuid4().hex[:8]}"
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = [row[column] for column in row_columns] + default_values
+        writer.writerow([COPY_NULL if value is None else value for value in values])
+    buffer.seek(0)
+
+    connection.exec_driver_sql(
+        f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+
+    copy_sql = f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            cursor.copy_expert(copy_sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+    connection.exec_driver_sql(
+        f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+    )
+
+
+def bulk_insert_ignore(session, table, rows: list[dict], conflict_columns: list[str]):
+    """
+    Insert rows, silently skipping any that conflict on conflict_columns.
+
+    Large batches on PostgreSQL go through COPY; everything else is a
+    single executemany INSERT ... ON CONFLICT DO NOTHING.
+    """
+    if not rows:
+        return
+
+    connection = session.connection()
+    if len(rows) >= COPY_MIN_ROWS and supports_copy(connection):
+        copy_insert_ignore(connection, table, rows, conflict_columns)
+        return
+
+    insert = insert_for(connection.dialect.name)
+    session.execute(insert(table).on_conflict_do_nothing(index_elements=conflict_columns), rows)
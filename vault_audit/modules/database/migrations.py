@@ -0,0 +1,284 @@
+"""
+Versioned schema migrations.
+
+Each entry in MIGRATIONS runs once, in order, in its own transaction,
+and is recorded in schema_migrations. Schema changes go in a new entry
+at the end of the list; never edit one that has shipped. On PostgreSQL
+an advisory lock serializes workers that start together; SQLite has no
+equivalent, so every migration must be safe to run twice.
+"""
+import json
+from datetime import date, datetime
+
+from sqlalchemy import Column, Date, DateTime, Index, Integer, MetaData, String, Table, Text, func, select
+
+from modules.database.models import SchemaMigration
+from modules.database.dialects import insert_for, POSTGRESQL
+
+# Arbitrary key for pg_advisory_xact_lock
+MIGRATION_LOCK_ID = 7264011
+
+# Rows per INSERT while backfilling
+BACKFILL_BATCH_SIZE = 500
+
+# Migrations build and read tables from these frozen definitions, never from
+# modules/database/models.py, so a later model change can't alter what an old
+# migration does. Only DDL matters here; Python-side defaults are left out.
+
+# Schema as it stood when migrations were introduced (version 1)
+BASELINE_METADATA = MetaData()
+
+BAG_RECORDS_V1 = Table(
+    'bag_records', BASELINE_METADATA,
+    Column('id', Integer, primary_key=True),
+    Column('label_id', String, unique=True, nullable=False, index=True),
+    Column('first_scan_datetime', DateTime, nullable=False),
+    Column('carrier_location', String, nullable=False),
+    Column('scan_count', Integer),
+    Column('last_scan_datetime', DateTime, nullable=True),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime)
+)
+
+LOCATION_TRACKERS_V1 = Table(
+    'location_trackers', BASELINE_METADATA,
+    Column('id', Integer, primary_key=True),
+    Column('carrier_location', String, unique=True, nullable=False, index=True),
+    Column('first_scan_date', Date, nullable=False),
+    Column('last_scan_date', Date, nullable=False),
+    Column('total_days_tracked', Integer),
+    Column('total_unique_bags', Integer),
+    Column('total_scans', Integer),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime)
+)
+
+IMPORT_RECORDS_V1 = Table(
+    'import_records', BASELINE_METADATA,
+    Column('id', Integer, primary_key=True),
+    Column('import_date', Date, nullable=False, index=True),
+    Column('carrier_location', String, nullable=False, index=True),
+    Column('total_labels', Integer),
+    Column('labels_json', Text, nullable=False),
+    Column('created_at', DateTime)
+)
+
+LABEL_IMPORT_HISTORY_V1 = Table(
+    'label_import_history', BASELINE_METADATA,
+    Column('id', Integer, primary_key=True),
+    Column('label_id', String, nullable=False, index=True),
+    Column('carrier_location', String, nullable=False, index=True),
+    Column('first_import_date', Date, nullable=False),
+    Column('last_import_date', Date, nullable=False),
+    Column('import_count', Integer),
+    Column('import_dates_json', Text, nullable=False),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Index('ux_label_import_history_label_location', 'label_id', 'carrier_location', unique=True),
+    Index('ix_label_import_history_location_first_import', 'carrier_location', 'first_import_date',
+          'label_id', 'last_import_date', 'import_count')
+)
+
+LABEL_IMPORT_DATES_V1 = Table(
+    'label_import_dates', BASELINE_METADATA,
+    Column('label_id', String, primary_key=True),
+    Column('carrier_location', String, primary_key=True),
+    Column('import_date', Date, primary_key=True),
+    Index('ix_label_import_dates_location_date', 'carrier_location', 'import_date')
+)
+
+DB_META_V1 = Table(
+    'db_meta', BASELINE_METADATA,
+    Column('key', String, primary_key=True),
+    Column('value', Integer, nullable=False)
+)
+
+# Version 3: keyset pagination indexes; only the indexed columns are declared
+BAG_RECORDS_V3 = Table(
+    'bag_records', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('first_scan_datetime', DateTime),
+    Column('carrier_location', String),
+    Index('ix_bag_records_first_scan_id', 'first_scan_datetime', 'id'),
+    Index('ix_bag_records_location_first_scan_id', 'carrier_location', 'first_scan_datetime', 'id')
+)
+
+# Version 4
+IMPORT_RECORD_LABELS_V4 = Table(
+    'import_record_labels', MetaData(),
+    Column('import_record_id', Integer, primary_key=True),
+    Column('label_id', String, primary_key=True),
+    Column('position', Integer, nullable=False)
+)
+
+
+def _merge_duplicate_histories(connection):
+    """Fold label_import_history rows sharing a label and location into the oldest one"""
+    history = LABEL_IMPORT_HISTORY_V1
+    key = (history.c.label_id, history.c.carrier_location)
+    duplicates = connection.execute(
+        select(*key).group_by(*key).having(func.count() > 1)
+    ).all()
+
+    for label_id, carrier_location in duplicates:
+        matches = (history.c.label_id == label_id) & (history.c.carrier_location == carrier_location)
+        rows = connection.execute(select(history).where(matches).order_by(history.c.id)).all()
+
+        import_dates = sorted({
+            date_str for row in rows
+            for date_str in (json.loads(row.import_dates_json) if row.import_dates_json else [])
+        })
+        updated = [row.updated_at for row in rows if row.updated_at]
+        connection.execute(history.update().where(history.c.id == rows[0].id).values(
+            first_import_date=min(row.first_import_date for row in rows),
+            last_import_date=max(row.last_import_date for row in rows),
+            import_count=len(import_dates) or max(row.import_count or 1 for row in rows),
+            import_dates_json=json.dumps(import_dates),
+            updated_at=max(updated) if updated else None
+        ))
+        connection.execute(history.delete().where(matches & (history.c.id != rows[0].id)))
+
+
+def _baseline_schema(connection):
+    """Tables and indexes as they stood when migrations were introduced"""
+    BASELINE_METADATA.create_all(connection, checkfirst=True)
+
+    # Databases created before migrations only have the original tables and
+    # their column indexes; add the indexes introduced since, once the rows
+    # the unique history index would reject are merged
+    _merge_duplicate_histories(connection)
+    for table in BASELINE_METADATA.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _backfill_import_dates(connection):
+    """Copy the legacy JSON date/label lists into label_import_dates"""
+    label_import_dates = LABEL_IMPORT_DATES_V1
+    if connection.execute(select(label_import_dates.c.label_id).limit(1)).first() is not None:
+        return
+
+    insert = insert_for(connection.dialect.name)
+    statement = insert(label_import_dates).on_conflict_do_nothing()
+    batch = []
+
+    def add(label_id, carrier_location, import_date):
+        batch.append({'label_id': label_id, 'carrier_location': carrier_location, 'import_date': import_date})
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            connection.execute(statement, batch)
+            batch.clear()
+
+    histories = connection.execute(select(
+        LABEL_IMPORT_HISTORY_V1.c.label_id,
+        LABEL_IMPORT_HISTORY_V1.c.carrier_location,
+        LABEL_IMPORT_HISTORY_V1.c.import_dates_json
+    )).all()
+    for label_id, carrier_location, dates_json in histories:
+        for date_str in json.loads(dates_json) if dates_json else []:
+            add(label_id, carrier_location, date.fromisoformat(date_str))
+
+    records = connection.execute(select(
+        IMPORT_RECORDS_V1.c.import_date,
+        IMPORT_RECORDS_V1.c.carrier_location,
+        IMPORT_RECORDS_V1.c.labels_json
+    )).all()
+    for import_date, carrier_location, labels_json in records:
+        for label in json.loads(labels_json) if labels_json else []:
+            if label and label.strip():
+                add(label.strip(), carrier_location, import_date)
+
+    if batch:
+        connection.execute(statement, batch)
+
+
+def _bag_keyset_indexes(connection):
+    """Indexes behind the keyset-paginated /bags listings"""
+    for index in BAG_RECORDS_V3.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _import_record_labels(connection):
+    """Labels per import record, so two imports at a location on one day stay apart"""
+    IMPORT_RECORD_LABELS_V4.create(connection, checkfirst=True)
+    if connection.execute(select(IMPORT_RECORD_LABELS_V4.c.import_record_id).limit(1)).first() is not None:
+        return
+
+    statement = insert_for(connection.dialect.name)(IMPORT_RECORD_LABELS_V4).on_conflict_do_nothing()
+    records = connection.execute(select(
+        IMPORT_RECORDS_V1.c.id,
+        IMPORT_RECORDS_V1.c.import_date,
+        IMPORT_RECORDS_V1.c.carrier_location,
+        IMPORT_RECORDS_V1.c.labels_json
+    )).all()
+    for import_record_id, import_date, carrier_location, labels_json in records:
+        labels = json.loads(labels_json) if labels_json else []
+        if not labels:
+            # Recorded while labels lived only in label_import_dates, which keeps the day, not the import
+            labels = connection.execute(
+                select(LABEL_IMPORT_DATES_V1.c.label_id).where(
+                    LABEL_IMPORT_DATES_V1.c.carrier_location == carrier_location,
+                    LABEL_IMPORT_DATES_V1.c.import_date == import_date
+                ).order_by(LABEL_IMPORT_DATES_V1.c.label_id)
+            ).scalars().all()
+
+        labels = dict.fromkeys(label.strip() for label in labels if label and label.strip())
+        rows = [
+            {'import_record_id': import_record_id, 'label_id': label, 'position': position}
+            for position, label in enumerate(labels)
+        ]
+        for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+            connection.execute(statement, rows[start:start + BACKFILL_BATCH_SIZE])
+
+
+MIGRATIONS = [
+    (1, 'baseline schema', _baseline_schema),
+    (2, 'backfill label_import_dates from legacy JSON columns', _backfill_import_dates),
+    (3, 'bag_records keyset pagination indexes', _bag_keyset_indexes),
+    (4, 'import_record_labels link table', _import_record_labels),
+]
+
+
+def _lock(connection):
+    """Hold the migration lock until the transaction ends (PostgreSQL only)"""
+    if connection.dialect.name == POSTGRESQL:
+        connection.exec_driver_sql(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})")
+
+
+def migrate(engine) -> list[int]:
+    """
+    Apply pending migrations.
+
+    Returns:
+        Versions applied by this call, in order
+    """
+    insert = insert_for(engine.dialect.name)
+
+    with engine.begin() as connection:
+        _lock(connection)
+        SchemaMigration.__table__.create(connection, checkfirst=True)
+
+    applied = []
+    for version, name, migration in MIGRATIONS:
+        with engine.begin() as connection:
+            _lock(connection)
+
+            done = connection.execute(
+                select(SchemaMigration.version).where(SchemaMigration.version == version)
+            ).first()
+            if done:
+                continue
+
+            migration(connection)
+            connection.execute(
+                insert(SchemaMigration).values(version=version, name=name, applied_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=['version'])
+            )
+            applied.append(version)
+
+    return applied
+
+
+def current_version(engine) -> int:
+    with engine.connect() as connection:
+        versions = connection.execute(select(SchemaMigration.version)).scalars().all()
+    return max(versions, default=0)
@@ -1,14 +1,30 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Text, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, date
+from functools import lru_cache
 import pytz
 import json
 
 Base = declarative_base()
 
+# Scan times are stored as naive UTC and shown in Central time
+CST = pytz.timezone('America/Chicago')
+
+
+# Scans recorded together share a timestamp, so listings repeat the same values
+@lru_cache(maxsize=4096)
+def format_scan_datetime(value):
+    return value.replace(tzinfo=pytz.utc).astimezone(CST).strftime("%m/%d/%y %H:%M:%S CST") if value else None
+
+
 class BagRecord(Base):
     __tablename__ = 'bag_records'
+    __table_args__ = (
+        # Keyset pagination of bag listings, newest first, overall and per location
+        Index('ix_bag_records_first_scan_id', 'first_scan_datetime', 'id'),
+        Index('ix_bag_records_location_first_scan_id', 'carrier_location', 'first_scan_datetime', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     label_id = Column(String, unique=True, nullable=False, index=True)
@@ -23,20 +39,35 @@ class BagRecord(Base):
         return f"<BagRecord(label_id='{self.label_id}', location='{self.carrier_location}', scans={self.scan_count})>"
 
     def to_dict(self):
-        cst = pytz.timezone('America/Chicago')
-        first_scan_cst = self.first_scan_datetime.replace(tzinfo=pytz.utc).astimezone(cst) if self.first_scan_datetime else None
-        last_scan_cst = self.last_scan_datetime.replace(tzinfo=pytz.utc).astimezone(cst) if self.last_scan_datetime else None
-
-        return {
-            'id': self.id,
-            'label_id': self.label_id,
-            'first_scan_datetime': first_scan_cst.strftime("%m/%d/%y %H:%M:%S CST") if first_scan_cst else None,
-            'carrier_location': self.carrier_location,
-            'scan_count': self.scan_count,
-            'last_scan_datetime': last_scan_cst.strftime("%m/%d/%y %H:%M:%S CST") if last_scan_cst else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return bag_row_to_dict(tuple(getattr(self, column.key) for column in BAG_COLUMNS))
+
+
+# Columns selected for bag listings, in bag_row_to_dict's order
+BAG_COLUMNS = (
+    BagRecord.id,
+    BagRecord.label_id,
+    BagRecord.first_scan_datetime,
+    BagRecord.carrier_location,
+    BagRecord.scan_count,
+    BagRecord.last_scan_datetime,
+    BagRecord.created_at,
+    BagRecord.updated_at
+)
+
+
+def bag_row_to_dict(row) -> dict:
+    """BagRecord.to_dict() for a BAG_COLUMNS row, without loading the entity"""
+    bag_id, label_id, first_scan, carrier_location, scan_count, last_scan, created_at, updated_at = row
+    return {
+        'id': bag_id,
+        'label_id': label_id,
+        'first_scan_datetime': format_scan_datetime(first_scan),
+        'carrier_location': carrier_location,
+        'scan_count': scan_count,
+        'last_scan_datetime': format_scan_datetime(last_scan),
+        'created_at': created_at.isoformat() if created_at else None,
+        'updated_at': updated_at.isoformat() if updated_at else None
+    }
 
 
 class LocationTracker(Base):
@@ -77,7 +108,7 @@ class ImportRecord(Base):
     import_date = Column(Date, nullable=False, index=True)  # Date from Excel "Created At"
     carrier_location = Column(String, nullable=False, index=True)
     total_labels = Column(Integer, default=0)
-    labels_json = Column(Text, nullable=False)  # JSON list of all valid labels
+    labels_json = Column(Text, nullable=False, default='[]')  # Legacy JSON list; labels now live in import_record_labels
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -92,13 +123,13 @@ class ImportRecord(Base):
         self.labels_json = json.dumps(labels_list)
         self.total_labels = len(labels_list)
 
-    def to_dict(self):
+    def to_dict(self, labels=None):
         return {
             'id': self.id,
             'import_date': self.import_date.strftime("%Y-%m-%d") if self.import_date else None,
             'carrier_location': self.carrier_location,
             'total_labels': self.total_labels,
-            'labels': self.get_labels(),
+            'labels': labels if labels is not None else self.get_labels(),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -106,6 +137,13 @@ class ImportRecord(Base):
 class LabelImportHistory(Base):
     """Tracks individual label appearances across multiple imports"""
     __tablename__ = 'label_import_history'
+    __table_args__ = (
+        # One history row per label per location; target of the import upserts
+        Index('ux_label_import_history_label_location', 'label_id', 'carrier_location', unique=True),
+        # Covers the aged-label query: range on first_import_date within a location
+        Index('ix_label_import_history_location_first_import', 'carrier_location', 'first_import_date',
+              'label_id', 'last_import_date', 'import_count'),
+    )
 
     id = Column(Integer, primary_key=True)
     label_id = Column(String, nullable=False, index=True)
@@ -113,7 +151,7 @@ class LabelImportHistory(Base):
     first_import_date = Column(Date, nullable=False)  # First time this label appeared
     last_import_date = Column(Date, nullable=False)   # Most recent appearance
     import_count = Column(Integer, default=1)         # How many imports it appeared in
-    import_dates_json = Column(Text, nullable=False)  # JSON list of all import dates
+    import_dates_json = Column(Text, nullable=False, default='[]')  # Legacy JSON list; dates now live in label_import_dates
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -137,7 +175,7 @@ class LabelImportHistory(Base):
             return 0
         return (date.today() - self.first_import_date).days
 
-    def to_dict(self):
+    def to_dict(self, import_dates=None):
         return {
             'id': self.id,
             'label_id': self.label_id,
@@ -145,8 +183,59 @@ class LabelImportHistory(Base):
             'first_import_date': self.first_import_date.strftime("%Y-%m-%d") if self.first_import_date else None,
             'last_import_date': self.last_import_date.strftime("%Y-%m-%d") if self.last_import_date else None,
             'import_count': self.import_count,
-            'import_dates': self.get_import_dates(),
+            'import_dates': import_dates if import_dates is not None else self.get_import_dates(),
             'days_in_vault': self.get_days_in_vault(),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+class LabelImportDate(Base):
+    """One row per label, location and import date it appeared on"""
+    __tablename__ = 'label_import_dates'
+    __table_args__ = (
+        # Answers "which labels were imported here on this date"
+        Index('ix_label_import_dates_location_date', 'carrier_location', 'import_date'),
+    )
+
+    label_id = Column(String, primary_key=True)
+    carrier_location = Column(String, primary_key=True)
+    import_date = Column(Date, primary_key=True)
+
+    def __repr__(self):
+        return f"<LabelImportDate(label='{self.label_id}', location='{self.carrier_location}', date='{self.import_date}')>"
+
+
+class ImportRecordLabel(Base):
+    """One row per label of an import record, in file order"""
+    __tablename__ = 'import_record_labels'
+
+    import_record_id = Column(Integer, primary_key=True)
+    label_id = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<ImportRecordLabel(import={self.import_record_id}, label='{self.label_id}')>"
+
+
+class DatabaseMeta(Base):
+    """Small key/value counters about the database itself"""
+    __tablename__ = 'db_meta'
+
+    key = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DatabaseMeta(key='{self.key}', value={self.value})>"
+
+
+class SchemaMigration(Base):
+    """One row per applied migration in modules/database/migrations.py"""
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SchemaMigration(version={self.version}, name='{self.name}')>"
@@ -0,0 +1,372 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# Acknowledge as soon as scans are queued; a crash loses what isn't committed yet
+DURABILITY_ASYNC = 'async'
+# Acknowledge only once the batch holding the scans has committed
+DURABILITY_SYNC = 'sync'
+DURABILITY_MODES = (DURABILITY_ASYNC, DURABILITY_SYNC)
+
+# Seconds to wait before each retry of a failed async group commit
+DEFAULT_RETRY_DELAYS = (0.1, 0.5, 2, 5)
+
+# A replay file claimed from failed_path is touched this often until its scans
+# commit; one left untouched for CLAIM_STALE_SECONDS belongs to a process that
+# died mid-replay and is replayed again
+CLAIM_HEARTBEAT_SECONDS = 30
+CLAIM_STALE_SECONDS = 300
+
+
+class ScanTicket:
+    """Handle for one submitted group of scans"""
+    __slots__ = ('labels', 'carrier_location', 'enqueued_at', 'results', 'error', 'dead_lettered', '_done')
+
+    def __init__(self, labels: list[str], carrier_location: str):
+        self.labels = labels
+        self.carrier_location = carrier_location
+        self.enqueued_at = time.monotonic()
+        self.results = None
+        self.error = None
+        # Failed, but saved to failed_path for the next start
+        self.dead_lettered = False
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the scans are committed (or failed); False on timeout"""
+        return self._done.wait(timeout)
+
+
+class ScanWriteQueue:
+    """
+    Write-behind queue that group-commits scans on a writer thread.
+
+    Submitted scans are committed through DatabaseManager.record_scans,
+    one transaction per location per batch. A batch is written once
+    max_batch scans are waiting or the oldest has waited flush_interval
+    seconds. Whatever is still queued is flushed when the process exits.
+
+    Async scans are already acknowledged, so a failed commit is retried
+    after each of retry_delays (holding back later batches to keep scan
+    order). Scans that still fail are appended to failed_path, if set,
+    and queued again the next time an async queue starts on that file.
+    Sync submitters get the error instead.
+    """
+
+    def __init__(self, db_manager, durability: str = DURABILITY_ASYNC, flush_interval: float = 0.05,
+                 max_batch: int = 1000, max_pending: int = 100000,
+                 retry_delays: tuple = DEFAULT_RETRY_DELAYS, failed_path: Optional[str] = None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+
+        self.db_manager = db_manager
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.retry_delays = retry_delays if durability == DURABILITY_ASYNC else ()
+        self.failed_path = failed_path
+
+        self._pending = deque()
+        self._pending_scans = 0
+        self._inflight = []
+        self._last_ticket = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.enqueued_scans = 0
+        self.committed_scans = 0
+        self.failed_scans = 0
+        self.retried_batches = 0
+        self.dead_lettered_scans = 0
+        self.requeued_scans = 0
+        self.last_error = None
+        self.batches = 0
+        self.last_commit_at = None
+        self.last_batch_seconds = None
+
+        self._writer = threading.Thread(target=self._run, name='scan-writer', daemon=True)
+        self._writer.start()
+        self._requeue = None
+        atexit.register(self.close)
+        self._requeue_failed()
+
+    def submit(self, label_ids: list[str], carrier_location: str) -> ScanTicket:
+        """
+        Queue scans in scan order.
+
+        In sync mode this returns only after the scans are committed, with
+        the record dicts in ticket.results; a failed write is raised.
+        """
+        labels = [label.strip() for label in label_ids if label and label.strip()]
+        ticket = ScanTicket(labels, carrier_location)
+
+        if not labels:
+            ticket.results = {}
+            ticket._done.set()
+            return ticket
+
+        with self._cond:
+            # Back-pressure instead of unbounded memory when the disk falls behind
+            while self._pending_scans >= self.max_pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError('Scan queue is closed')
+
+            self._pending.append(ticket)
+            self._pending_scans += len(labels)
+            self.enqueued_scans += len(labels)
+            self._last_ticket = ticket
+            self._cond.notify_all()
+
+        if self.durability == DURABILITY_SYNC:
+            ticket.wait()
+            if ticket.error:
+                raise ticket.error
+        return ticket
+
+    def record_scan(self, label_id: str, carrier_location: str) -> ScanTicket:
+        return self.submit([label_id], carrier_location)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything submitted so far is committed"""
+        with self._cond:
+            ticket = self._last_ticket
+            self._cond.notify_all()
+        return ticket.wait(timeout) if ticket else True
+
+    def close(self, timeout: float = 30):
+        """Stop accepting scans, write what's queued and stop the writer"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout)
+        if self._requeue is not None:
+            self._requeue.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            oldest = self._inflight[0] if self._inflight else (self._pending[0] if self._pending else None)
+            return {
+                'durability': self.durability,
+                'depth': self._pending_scans + sum(len(ticket.labels) for ticket in self._inflight),
+                'lag_seconds': round(time.monotonic() - oldest.enqueued_at, 3) if oldest else 0.0,
+                'enqueued_scans': self.enqueued_scans,
+                'committed_scans': self.committed_scans,
+                'failed_scans': self.failed_scans,
+                'retried_batches': self.retried_batches,
+                'dead_lettered_scans': self.dead_lettered_scans,
+                'requeued_scans': self.requeued_scans,
+                'last_error': self.last_error,
+                'batches': self.batches,
+                'last_batch_seconds': self.last_batch_seconds,
+                'seconds_since_commit': round(time.monotonic() - self.last_commit_at, 3) if self.last_commit_at else None,
+                'writer_alive': self._writer.is_alive()
+            }
+
+    # ===== WRITER THREAD =====
+
+    def _take_batch(self) -> Optional[list[ScanTicket]]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            # Let the batch fill up until the oldest scan has waited flush_interval
+            deadline = self._pending[0].enqueued_at + self.flush_interval
+            while not self._closed and self._pending_scans < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            scans = 0
+            while self._pending and (not batch or scans + len(self._pending[0].labels) <= self.max_batch):
+                ticket = self._pending.popleft()
+                batch.append(ticket)
+                scans += len(ticket.labels)
+
+            self._pending_scans -= scans
+            self._inflight = batch
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def _write(self, batch: list[ScanTicket]):
+        start = time.monotonic()
+
+        # One transaction per location, scans kept in submission order
+        by_location = {}
+        for ticket in batch:
+            by_location.setdefault(ticket.carrier_location, []).append(ticket)
+
+        committed = 0
+        failed = 0
+        last_error = None
+        for carrier_location, tickets in by_location.items():
+            labels = [label for ticket in tickets for label in ticket.labels]
+            error = self._record(labels, carrier_location, tickets)
+            if error is None:
+                committed += len(labels)
+                continue
+
+            print(f"Error recording queued scans: {error}")
+            for ticket in tickets:
+                ticket.error = error
+            failed += len(labels)
+            last_error = str(error)
+            if self.durability == DURABILITY_ASYNC and self._dead_letter(labels, carrier_location):
+                for ticket in tickets:
+                    ticket.dead_lettered = True
+
+        with self._cond:
+            self.committed_scans += committed
+            self.failed_scans += failed
+            self.last_error = last_error
+            self.batches += 1
+            self.last_commit_at = time.monotonic()
+            self.last_batch_seconds = round(self.last_commit_at - start, 4)
+            self._inflight = []
+
+        for ticket in batch:
+            ticket._done.set()
+
+    def _record(self, labels: list[str], carrier_location: str, tickets: list[ScanTicket]) -> Optional[Exception]:
+        """Commit one location's scans, retrying per retry_delays; the last error if it never commits"""
+        for attempt in range(len(self.retry_delays) + 1):
+            try:
+                results = self.db_manager.record_scans(labels, carrier_location)
+            except Exception as e:
+                error = e
+            else:
+                for ticket in tickets:
+                    ticket.results = {label: results[label] for label in ticket.labels if label in results}
+                return None
+            finally:
+                self.db_manager.Session.remove()
+
+            if attempt < len(self.retry_delays):
+                print(f"Error recording queued scans, retrying in {self.retry_delays[attempt]}s: {error}")
+                with self._cond:
+                    self.retried_batches += 1
+                time.sleep(self.retry_delays[attempt])
+        return error
+
+    def _dead_letter(self, labels: list[str], carrier_location: str) -> bool:
+        """Keep acknowledged scans that couldn't be committed for the next start; False if they couldn't be saved"""
+        if not self.failed_path:
+            return False
+        try:
+            with open(self.failed_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'carrier_location': carrier_location, 'labels': labels}) + '\n')
+        except OSError as e:
+            print(f"Error saving failed scans: {e}")
+            return False
+        with self._cond:
+            self.dead_lettered_scans += len(labels)
+        return True
+
+    def _requeue_failed(self):
+        """
+        Queue the scans an earlier run couldn't commit.
+
+        The replay files are only deleted once their scans have committed
+        (or failed again and were saved to failed_path anew), on a
+        background thread so startup doesn't wait for the writes.
+        """
+        if not self.failed_path or self.durability != DURABILITY_ASYNC:
+            return
+
+        claimed = self._claim_failed()
+        tickets = []
+        for path in claimed:
+            for entry in self._read_failed(path):
+                ticket = self.submit(entry['labels'], entry['carrier_location'])
+                tickets.append(ticket)
+                with self._cond:
+                    self.requeued_scans += len(ticket.labels)
+
+        if claimed:
+            self._requeue = threading.Thread(target=self._finish_requeue, args=(claimed, tickets),
+                                             name='scan-requeue', daemon=True)
+            self._requeue.start()
+
+    def _claim_failed(self) -> list[str]:
+        """
+        Rename failed_path, and replay files abandoned by a process that died
+        before its replay committed, to names owned by this process, so
+        workers starting together never replay the same scans twice.
+        """
+        candidates = [self.failed_path]
+        for path in glob.glob(glob.escape(self.failed_path) + '.*.*'):
+            try:
+                if time.time() - os.path.getmtime(path) > CLAIM_STALE_SECONDS:
+                    candidates.append(path)
+            except OSError:
+                continue
+
+        claimed = []
+        for index, path in enumerate(candidates):
+            target = f"{self.failed_path}.{os.getpid()}-{threading.get_ident()}.{index}"
+            try:
+                os.replace(path, target)
+            except OSError:
+                # Missing, or claimed by another worker first
+                continue
+            claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def _read_failed(path: str) -> list[dict]:
+        """The entries of a replay file; lines torn by a crash mid-append are skipped"""
+        entries = []
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    entries.append({'carrier_location': entry['carrier_location'], 'labels': list(entry['labels'])})
+                except (ValueError, TypeError, KeyError) as e:
+                    print(f"Skipping unreadable failed scans line {number} of {path}: {e}")
+        return entries
+
+    def _finish_requeue(self, claimed: list[str], tickets: list[ScanTicket]):
+        for ticket in tickets:
+            while not ticket.wait(CLAIM_HEARTBEAT_SECONDS):
+                # Still waiting on the writer; keep the claim from looking abandoned
+                for path in claimed:
+                    try:
+                        os.utime(path)
+                    except OSError:
+                        pass
+
+        lost = [ticket for ticket in tickets if ticket.error is not None and not ticket.dead_lettered]
+        if lost:
+            print(f"Keeping {', '.join(claimed)}: {sum(len(ticket.labels) for ticket in lost)} "
+                  f"replayed scans could neither be committed nor saved again")
+            return
+        for path in claimed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
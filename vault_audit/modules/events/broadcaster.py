@@ -0,0 +1,157 @@
+import json
+import queue
+import threading
+import time
+from typing import Optional
+
+
+class AuditBroadcaster:
+    """
+    Fan-out of live audit events to any number of subscribers per audit.
+
+    Each subscriber owns a bounded queue. publish() never blocks: when a
+    slow subscriber's queue is full its oldest event is dropped, so one
+    stalled browser can't hold up the scan endpoint. Subscribers only see
+    events published in the same worker process.
+
+    Every open stream holds a request thread, so subscribe() refuses new
+    subscribers past max_subscribers per process.
+    """
+
+    def __init__(self, max_queue_size: int = 256, max_subscribers: Optional[int] = None):
+        self.max_queue_size = max_queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._subscriber_total = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, audit_id: str) -> Optional[queue.Queue]:
+        """A new subscription queue, or None when the process is at max_subscribers"""
+        subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if self.max_subscribers is not None and self._subscriber_total >= self.max_subscribers:
+                return None
+            self._subscribers.setdefault(audit_id, set()).add(subscription)
+            self._subscriber_total += 1
+        return subscription
+
+    def unsubscribe(self, audit_id: str, subscription: queue.Queue):
+        with self._lock:
+            subscriptions = self._subscribers.get(audit_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            self._subscriber_total -= 1
+            if not subscriptions:
+                del self._subscribers[audit_id]
+
+    def publish(self, audit_id: str, event: str, data: dict):
+        self._deliver(audit_id, event, data)
+
+    def _deliver(self, audit_id: str, event: str, data: dict):
+        """Hand an event to this process's subscribers of audit_id"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(audit_id, ()))
+
+        for subscription in subscriptions:
+            while True:
+                try:
+                    subscription.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def subscriber_count(self, audit_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(audit_id, ()))
+
+
+class RedisAuditBroadcaster(AuditBroadcaster):
+    """
+    Audit events relayed through Redis pub/sub.
+
+    publish() goes to Redis, so subscribers on every worker sharing the
+    Redis session store see every event. Each process keeps a single
+    pattern subscription, read by a background thread that hands events
+    to its local subscriber queues. Needs the optional `redis` package.
+    """
+
+    CHANNEL_PREFIX = 'vault_audit:events:'
+
+    # Seconds before re-subscribing after the Redis connection drops
+    RECONNECT_DELAY = 1
+
+    def __init__(self, url: str, max_queue_size: int = 256, max_subscribers: Optional[int] = None):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis event broadcaster needs the 'redis' package (pip install redis)") from e
+
+        super().__init__(max_queue_size=max_queue_size, max_subscribers=max_subscribers)
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._listening = threading.Event()
+
+    def subscribe(self, audit_id: str) -> Optional[queue.Queue]:
+        self._start_listener()
+        return super().subscribe(audit_id)
+
+    def publish(self, audit_id: str, event: str, data: dict):
+        try:
+            self.client.publish(self.CHANNEL_PREFIX + audit_id, json.dumps({'event': event, 'data': data}))
+        except Exception as e:
+            # The scan itself is already stored; only live viewers miss it
+            print(f"Error publishing audit event: {e}")
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='audit-events', daemon=True)
+                self._listener.start()
+        # Events published before the subscription is live would be lost
+        self._listening.wait(timeout=5)
+
+    def _listen(self):
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.CHANNEL_PREFIX + '*')
+                self._listening.set()
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()
+                    payload = json.loads(message['data'])
+                    self._deliver(channel[len(self.CHANNEL_PREFIX):], payload['event'], payload['data'])
+            except Exception as e:
+                print(f"Error reading audit events: {e}")
+                time.sleep(self.RECONNECT_DELAY)
+            finally:
+                pubsub.close()
+
+
+def create_broadcaster(session_store_url: str = 'memory://', max_subscribers: Optional[int] = None):
+    """
+    Build the event broadcaster that matches the session store.
+
+    Args:
+        session_store_url: The VAULT_SESSION_STORE URL
+        max_subscribers: Open event streams allowed per process
+
+    Returns:
+        An in-process broadcaster for memory://, a Redis pub/sub one for
+        redis://, or None for stores shared between workers without pub/sub
+        (sqlite://), where a subscriber could sit on another worker than
+        the scans and never hear of them
+    """
+    if session_store_url.startswith('memory://'):
+        return AuditBroadcaster(max_subscribers=max_subscribers)
+    if session_store_url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisAuditBroadcaster(session_store_url, max_subscribers=max_subscribers)
+    return None
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
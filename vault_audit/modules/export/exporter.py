@@ -1,56 +1,62 @@
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.comments import Comment
 from datetime import datetime
 import os
 from modules.models.models import AuditResult
 
+# Shared style objects, created once and reused for every cell in every report
+TITLE_FONT = Font(size=16, bold=True)
+SECTION_FONT = Font(size=14, bold=True)
+BOLD_FONT = Font(bold=True)
+RED_BOLD_FONT = Font(color="FF0000", bold=True)
+ORANGE_BOLD_FONT = Font(color="FFA500", bold=True)
+HEADER_FONT = Font(size=14, bold=True, color="FFFFFF")
+NONE_FONT = Font(italic=True, color="666666")
+
+RED_FILL = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+ORANGE_FILL = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+AGED_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+
+LEFT = Alignment(horizontal='left')
+CENTER = Alignment(horizontal='center')
+
+
+def _cell(sheet, value, font=None, fill=None, alignment=None, comment=None):
+    cell = WriteOnlyCell(sheet, value=value)
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    if alignment:
+        cell.alignment = alignment
+    if comment:
+        cell.comment = comment
+    return cell
+
+
+def aged_label_rows(audit_result: AuditResult, bag_durations: dict, labels_over_3_days: list):
+    """Yield (label, first seen, days) for the BAGS IN VAULT 3+ DAYS section"""
+    if labels_over_3_days:
+        for label_info in labels_over_3_days:
+            yield label_info['label_id'], label_info.get('first_import_date', 'Unknown'), label_info['days_in_vault']
+    elif bag_durations:
+        for label in audit_result.matched_labels:
+            duration_info = bag_durations.get(label)
+            if duration_info and duration_info['days_in_vault'] >= 3:
+                first_scan = duration_info.get('first_scan')
+                first_scan_date = first_scan.strftime('%Y-%m-%d') if first_scan else 'Unknown'
+                yield label, first_scan_date, duration_info['days_in_vault']
 
-def export_audit_results(audit_result: AuditResult, container_info: dict, output_folder: str = "exports", bag_durations: dict = None, labels_over_3_days: list = None) -> str:
-    os.makedirs(output_folder, exist_ok=True)
-
-    wb = openpyxl.Workbook()
-
-    summary_sheet = wb.active
-    summary_sheet.title = "Summary"
-
-    summary_sheet['A1'] = "Vault Audit Report"
-    summary_sheet['A1'].font = Font(size=16, bold=True)
-    summary_sheet['A1'].alignment = Alignment(horizontal='left')
-
-    summary_sheet['A3'] = "Report Generated:"
-    summary_sheet['B3'] = datetime.now().strftime("%m/%d/%y %H:%M:%S CST")
-
-    summary_sheet['A4'] = "Container Holdover Date:"
-    summary_sheet['B4'] = container_info.get('created_at', 'N/A')
-
-    summary_sheet['A5'] = "Location:"
-    summary_sheet['B5'] = container_info.get('location', 'N/A')
-
-    # Audit Summary section
-    audit_summary_row = 7
 
-    summary_sheet[f'A{audit_summary_row}'] = "Audit Summary"
-    summary_sheet[f'A{audit_summary_row}'].font = Font(size=14, bold=True)
+def _write_summary_sheet(wb, audit_result: AuditResult, container_info: dict, bag_durations: dict, labels_over_3_days: list):
+    summary_sheet = wb.create_sheet("Summary")
+    for col in ['A', 'B']:
+        summary_sheet.column_dimensions[col].width = 25
 
     location = container_info.get('location', 'N/A')
 
-    # Calculate dynamic row positions
-    containers_row = audit_summary_row + 2
-    scanned_row = containers_row + 1
-    matched_row = scanned_row + 1
-    unmatched_row = matched_row + 1
-    not_scanned_row = unmatched_row + 1
-
-    summary_sheet[f'A{containers_row}'] = "Total Containers in Onsite:"
-    summary_sheet[f'B{containers_row}'] = len(audit_result.expected_not_scanned) + len(audit_result.matched_labels)
-    summary_sheet[f'B{containers_row}'].font = Font(bold=True)
-    summary_sheet[f'A{containers_row}'].comment = Comment(f"Total Containers in {location} onsite", "System")
-
-    summary_sheet[f'A{scanned_row}'] = "Total Scanned:"
-    summary_sheet[f'B{scanned_row}'] = audit_result.total_scanned
-    summary_sheet[f'B{scanned_row}'].font = Font(bold=True)
-
     # Calculate count of bags >=3 days (use import-based tracking if available)
     bags_3_plus_days = 0
     if labels_over_3_days:
@@ -59,142 +65,118 @@ def export_audit_results(audit_result: AuditResult, container_info: dict, output
         bags_3_plus_days = sum(1 for label in audit_result.matched_labels
                                if bag_durations.get(label) and bag_durations[label]['days_in_vault'] >= 3)
 
-    summary_sheet[f'A{matched_row}'] = "Labels >=3 Days in Vault:"
-    summary_sheet[f'B{matched_row}'] = f"🔥 {bags_3_plus_days}"
-    summary_sheet[f'B{matched_row}'].font = Font(color="FF0000", bold=True)
-    summary_sheet[f'A{matched_row}'].comment = Comment(f"Bags that have been in container-holdover for 3 or more days (import-based tracking)", "System")
-
-    summary_sheet[f'A{unmatched_row}'] = "Unmatched Labels:"
-    summary_sheet[f'B{unmatched_row}'] = len(audit_result.unmatched_labels)
-    summary_sheet[f'B{unmatched_row}'].font = Font(color="FF0000", bold=True)
-    summary_sheet[f'A{unmatched_row}'].comment = Comment(f"Physical Bag Found but not in {location} onsite", "System")
-
-    summary_sheet[f'A{not_scanned_row}'] = "Not Scanned:"
-    summary_sheet[f'B{not_scanned_row}'] = len(audit_result.expected_not_scanned)
-    summary_sheet[f'B{not_scanned_row}'].font = Font(color="FFA500", bold=True)
-    summary_sheet[f'A{not_scanned_row}'].comment = Comment(f"Bags in {location} onsite but physically in the {location} vault", "System")
-
-    for col in ['A', 'B']:
-        summary_sheet.column_dimensions[col].width = 25
+    summary_sheet.append([_cell(summary_sheet, "Vault Audit Report", font=TITLE_FONT, alignment=LEFT)])
+    summary_sheet.append([])
+    summary_sheet.append(["Report Generated:", datetime.now().strftime("%m/%d/%y %H:%M:%S CST")])
+    summary_sheet.append(["Container Holdover Date:", container_info.get('created_at', 'N/A')])
+    summary_sheet.append(["Location:", container_info.get('location', 'N/A')])
+    summary_sheet.append([])
 
+    # Audit Summary section
+    summary_sheet.append([_cell(summary_sheet, "Audit Summary", font=SECTION_FONT)])
+    summary_sheet.append([])
+
+    summary_sheet.append([
+        _cell(summary_sheet, "Total Containers in Onsite:",
+              comment=Comment(f"Total Containers in {location} onsite", "System")),
+        _cell(summary_sheet, len(audit_result.expected_not_scanned) + len(audit_result.matched_labels), font=BOLD_FONT)
+    ])
+    summary_sheet.append([
+        "Total Scanned:",
+        _cell(summary_sheet, audit_result.total_scanned, font=BOLD_FONT)
+    ])
+    summary_sheet.append([
+        _cell(summary_sheet, "Labels >=3 Days in Vault:",
+              comment=Comment(f"Bags that have been in container-holdover for 3 or more days (import-based tracking)", "System")),
+        _cell(summary_sheet, f"🔥 {bags_3_plus_days}", font=RED_BOLD_FONT)
+    ])
+    summary_sheet.append([
+        _cell(summary_sheet, "Unmatched Labels:",
+              comment=Comment(f"Physical Bag Found but not in {location} onsite", "System")),
+        _cell(summary_sheet, len(audit_result.unmatched_labels), font=RED_BOLD_FONT)
+    ])
+    summary_sheet.append([
+        _cell(summary_sheet, "Not Scanned:",
+              comment=Comment(f"Bags in {location} onsite but physically in the {location} vault", "System")),
+        _cell(summary_sheet, len(audit_result.expected_not_scanned), font=ORANGE_BOLD_FONT)
+    ])
+
+
+def _write_label_section(results_sheet, title: str, fill: PatternFill, labels):
+    results_sheet.append([_cell(results_sheet, title, font=HEADER_FONT, fill=fill, alignment=LEFT)])
+    results_sheet.append([_cell(results_sheet, "Label ID", font=BOLD_FONT)])
+
+    written = False
+    for label in labels:
+        results_sheet.append([label])
+        written = True
+
+    if not written:
+        results_sheet.append([_cell(results_sheet, "None", font=NONE_FONT)])
+
+
+def _write_results_sheet(wb, audit_result: AuditResult, bag_durations: dict, labels_over_3_days: list):
     results_sheet = wb.create_sheet("Results")
+    results_sheet.column_dimensions['A'].width = 40
+    results_sheet.column_dimensions['B'].width = 20
+    results_sheet.column_dimensions['C'].width = 15
 
     # Simple vertical layout - Section 1: BAGS IN VAULT 3+ DAYS
-    row = 1
-    results_sheet[f'A{row}'] = "BAGS IN VAULT 3+ DAYS"
-    results_sheet[f'A{row}'].font = Font(size=14, bold=True, color="FFFFFF")
-    results_sheet[f'A{row}'].fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-    results_sheet[f'A{row}'].alignment = Alignment(horizontal='left')
-
-    row += 1
-    results_sheet[f'A{row}'] = "Label ID"
-    results_sheet[f'A{row}'].font = Font(bold=True)
-    results_sheet[f'B{row}'] = "First Seen"
-    results_sheet[f'B{row}'].font = Font(bold=True)
-    results_sheet[f'C{row}'] = "Days"
-    results_sheet[f'C{row}'].font = Font(bold=True)
-
-    row += 1
-    if labels_over_3_days:
-        for label_info in labels_over_3_days:
-            label = label_info['label_id']
-            days = label_info['days_in_vault']
-            first_import = label_info.get('first_import_date', 'Unknown')
-
-            results_sheet[f'A{row}'] = label
-            results_sheet[f'A{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-
-            results_sheet[f'B{row}'] = first_import
-            results_sheet[f'B{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-            results_sheet[f'B{row}'].alignment = Alignment(horizontal='center')
-
-            results_sheet[f'C{row}'] = days
-            results_sheet[f'C{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-            results_sheet[f'C{row}'].alignment = Alignment(horizontal='center')
-            results_sheet[f'C{row}'].font = Font(bold=True)
-
-            row += 1
-    elif bag_durations:
-        for label in sorted(audit_result.matched_labels):
-            duration_info = bag_durations.get(label)
-            if duration_info and duration_info['days_in_vault'] >= 3:
-                first_scan = duration_info.get('first_scan')
-                first_scan_date = first_scan.strftime('%Y-%m-%d') if first_scan else 'Unknown'
-                days = duration_info['days_in_vault']
+    results_sheet.append([_cell(results_sheet, "BAGS IN VAULT 3+ DAYS", font=HEADER_FONT, fill=RED_FILL, alignment=LEFT)])
+    results_sheet.append([
+        _cell(results_sheet, "Label ID", font=BOLD_FONT),
+        _cell(results_sheet, "First Seen", font=BOLD_FONT),
+        _cell(results_sheet, "Days", font=BOLD_FONT)
+    ])
+
+    written = False
+    for label, first_seen, days in aged_label_rows(audit_result, bag_durations, labels_over_3_days):
+        results_sheet.append([
+            _cell(results_sheet, label, fill=AGED_FILL),
+            _cell(results_sheet, first_seen, fill=AGED_FILL, alignment=CENTER),
+            _cell(results_sheet, days, fill=AGED_FILL, alignment=CENTER, font=BOLD_FONT)
+        ])
+        written = True
+
+    if not written:  # No bags found
+        results_sheet.append([_cell(results_sheet, "None", font=NONE_FONT)])
 
-                results_sheet[f'A{row}'] = label
-                results_sheet[f'A{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+    # Blank row separator
+    results_sheet.append([])
+    results_sheet.append([])
 
-                results_sheet[f'B{row}'] = first_scan_date
-                results_sheet[f'B{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-                results_sheet[f'B{row}'].alignment = Alignment(horizontal='center')
+    # Section 2: UNMATCHED LABELS
+    _write_label_section(results_sheet, "UNMATCHED LABELS", RED_FILL, audit_result.unmatched_labels)
 
-                results_sheet[f'C{row}'] = days
-                results_sheet[f'C{row}'].fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-                results_sheet[f'C{row}'].alignment = Alignment(horizontal='center')
-                results_sheet[f'C{row}'].font = Font(bold=True)
+    # Blank row separator
+    results_sheet.append([])
+    results_sheet.append([])
 
-                row += 1
+    # Section 3: NOT SCANNED
+    _write_label_section(results_sheet, "NOT SCANNED", ORANGE_FILL, audit_result.expected_not_scanned)
 
-    if row == 3:  # No bags found
-        results_sheet[f'A{row}'] = "None"
-        results_sheet[f'A{row}'].font = Font(italic=True, color="666666")
-        row += 1
 
-    # Blank row separator
-    row += 2
+def write_audit_workbook(target, audit_result: AuditResult, container_info: dict, bag_durations: dict = None, labels_over_3_days: list = None):
+    """
+    Stream the audit report to a file path or a writable binary file object.
 
-    # Section 2: UNMATCHED LABELS
-    results_sheet[f'A{row}'] = "UNMATCHED LABELS"
-    results_sheet[f'A{row}'].font = Font(size=14, bold=True, color="FFFFFF")
-    results_sheet[f'A{row}'].fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-    results_sheet[f'A{row}'].alignment = Alignment(horizontal='left')
-
-    row += 1
-    results_sheet[f'A{row}'] = "Label ID"
-    results_sheet[f'A{row}'].font = Font(bold=True)
-
-    row += 1
-    if audit_result.unmatched_labels:
-        for label in sorted(audit_result.unmatched_labels):
-            results_sheet[f'A{row}'] = label
-            row += 1
-    else:
-        results_sheet[f'A{row}'] = "None"
-        results_sheet[f'A{row}'].font = Font(italic=True, color="666666")
-        row += 1
+    Uses openpyxl's write-only mode, so rows go straight to the output
+    instead of being held in an in-memory sheet.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    _write_summary_sheet(wb, audit_result, container_info, bag_durations, labels_over_3_days)
+    _write_results_sheet(wb, audit_result, bag_durations, labels_over_3_days)
+    wb.save(target)
 
-    # Blank row separator
-    row += 2
 
-    # Section 3: NOT SCANNED
-    results_sheet[f'A{row}'] = "NOT SCANNED"
-    results_sheet[f'A{row}'].font = Font(size=14, bold=True, color="FFFFFF")
-    results_sheet[f'A{row}'].fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-    results_sheet[f'A{row}'].alignment = Alignment(horizontal='left')
-
-    row += 1
-    results_sheet[f'A{row}'] = "Label ID"
-    results_sheet[f'A{row}'].font = Font(bold=True)
-
-    row += 1
-    if audit_result.expected_not_scanned:
-        for label in sorted(audit_result.expected_not_scanned):
-            results_sheet[f'A{row}'] = label
-            row += 1
-    else:
-        results_sheet[f'A{row}'] = "None"
-        results_sheet[f'A{row}'].font = Font(italic=True, color="666666")
-
-    # Set column widths
-    results_sheet.column_dimensions['A'].width = 40
-    results_sheet.column_dimensions['B'].width = 20
-    results_sheet.column_dimensions['C'].width = 15
+def export_audit_results(audit_result: AuditResult, container_info: dict, output_folder: str = "exports", bag_durations: dict = None, labels_over_3_days: list = None, filename: str = None) -> str:
+    os.makedirs(output_folder, exist_ok=True)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"vault_audit_report_{timestamp}.xlsx"
+    if not filename:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"vault_audit_report_{timestamp}.xlsx"
     filepath = os.path.join(output_folder, filename)
 
-    wb.save(filepath)
+    write_audit_workbook(filepath, audit_result, container_info, bag_durations, labels_over_3_days)
 
-    return filepath
\ No newline at end of file
+    return filepath
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional
+
+from modules.models.models import AuditResult
+from modules.export.exporter import aged_label_rows, write_audit_workbook
+
+# Rows buffered before a chunk is handed to the response
+CHUNK_ROWS = 1000
+
+
+@dataclass
+class AuditReport:
+    """Everything an exporter needs to render one audit"""
+    audit_result: AuditResult
+    container_info: dict
+    bag_durations: Optional[dict] = None
+    labels_over_3_days: Optional[list] = None
+
+
+class ReportExporter(ABC):
+    """One output format for audit reports; subclasses yield the body in chunks"""
+    name = None
+    mimetype = None
+    extension = None
+    # True when the whole body is built before the first chunk, so keeping it
+    # for repeat exports costs no extra memory
+    buffered = False
+
+    @abstractmethod
+    def iter_chunks(self, report: AuditReport) -> Iterator[bytes]:
+        ...
+
+    def download_name(self) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"vault_audit_report_{timestamp}.{self.extension}"
+
+
+def report_summary(report: AuditReport) -> dict:
+    """The Summary sheet figures as plain values"""
+    audit_result = report.audit_result
+    container_info = report.container_info
+    return {
+        'location': container_info.get('location', 'N/A'),
+        'created_at': container_info.get('created_at', 'N/A'),
+        'report_generated': datetime.now().strftime("%m/%d/%y %H:%M:%S CST"),
+        'total_containers_in_onsite': len(audit_result.expected_not_scanned) + len(audit_result.matched_labels),
+        'total_scanned': audit_result.total_scanned,
+        'labels_over_3_days': sum(1 for _ in aged_label_rows(audit_result, report.bag_durations, report.labels_over_3_days)),
+        'unmatched_labels': len(audit_result.unmatched_labels),
+        'not_scanned': len(audit_result.expected_not_scanned)
+    }
+
+
+class XlsxReportExporter(ReportExporter):
+    name = 'xlsx'
+    mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+    buffered = True
+
+    def iter_chunks(self, report: AuditReport) -> Iterator[bytes]:
+        # The zip container needs the whole workbook before it is complete
+        buffer = io.BytesIO()
+        write_audit_workbook(buffer, report.audit_result, report.container_info,
+                             report.bag_durations, report.labels_over_3_days)
+        yield buffer.getvalue()
+
+
+class CsvReportExporter(ReportExporter):
+    """
+    One flat table: section, item, value, first_seen, days_in_vault.
+
+    Summary rows carry the metric name in item and its value in value;
+    label rows carry the label in item.
+    """
+    name = 'csv'
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def iter_chunks(self, report: AuditReport) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        rows = 0
+
+        def flush():
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writerow(['section', 'item', 'value', 'first_seen', 'days_in_vault'])
+        for metric, value in report_summary(report).items():
+            writer.writerow(['summary', metric, value, '', ''])
+        yield flush()
+
+        sections = [
+            ('labels_over_3_days', aged_label_rows(report.audit_result, report.bag_durations, report.labels_over_3_days)),
+            ('unmatched', ((label, '', '') for label in report.audit_result.unmatched_labels)),
+            ('not_scanned', ((label, '', '') for label in report.audit_result.expected_not_scanned))
+        ]
+        for section, section_rows in sections:
+            for label, first_seen, days in section_rows:
+                writer.writerow([section, label, '', first_seen, days])
+                rows += 1
+                if rows % CHUNK_ROWS == 0:
+                    yield flush()
+
+        yield flush()
+
+
+class NdjsonReportExporter(ReportExporter):
+    """One JSON object per line, tagged with a type field"""
+    name = 'ndjson'
+    mimetype = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def iter_chunks(self, report: AuditReport) -> Iterator[bytes]:
+        lines = [json.dumps({'type': 'summary', **report_summary(report)})]
+
+        def records():
+            for label, first_seen, days in aged_label_rows(report.audit_result, report.bag_durations, report.labels_over_3_days):
+                yield {'type': 'labels_over_3_days', 'label_id': label, 'first_seen': first_seen, 'days_in_vault': days}
+            for label in report.audit_result.unmatched_labels:
+                yield {'type': 'unmatched', 'label_id': label}
+            for label in report.audit_result.expected_not_scanned:
+                yield {'type': 'not_scanned', 'label_id': label}
+
+        for record in records():
+            lines.append(json.dumps(record))
+            if len(lines) >= CHUNK_ROWS:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+EXPORTERS = {exporter.name: exporter for exporter in (XlsxReportExporter(), CsvReportExporter(), NdjsonReportExporter())}
+
+
+def get_exporter(name: str) -> Optional[ReportExporter]:
+    return EXPORTERS.get((name or 'xlsx').lower())
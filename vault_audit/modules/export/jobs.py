@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+from modules.export.exporter import export_audit_results
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def run_export_job(output_folder: str, job_filename: str, audit_result, container_info: dict,
+                   bag_durations: dict, labels_over_3_days: list) -> tuple[str, float]:
+    """
+    Render one report in a worker process; the file only appears once complete.
+
+    Returns:
+        (report path, seconds spent rendering)
+    """
+    start = time.perf_counter()
+    partial_name = job_filename + '.part'
+    partial_path = export_audit_results(
+        audit_result,
+        container_info,
+        output_folder,
+        bag_durations,
+        labels_over_3_days,
+        filename=partial_name
+    )
+    filepath = os.path.join(output_folder, job_filename)
+    os.replace(partial_path, filepath)
+    return filepath, time.perf_counter() - start
+
+
+class ExportJobQueue:
+    """
+    Background Excel report generation on a bounded process pool.
+
+    At most max_workers reports render at once and at most max_pending
+    jobs wait, so exports can't starve the request workers. Finished jobs
+    and their files are dropped after retention_seconds.
+    """
+
+    def __init__(self, output_folder: str, max_workers: int = 2, max_pending: int = 20,
+                 retention_seconds: int = 60 * 60, on_rendered: Optional[Callable[[float], None]] = None):
+        self.output_folder = output_folder
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        # Called with each successful job's render time in the worker
+        self.on_rendered = on_rendered
+
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_filename(job_id: str) -> str:
+        return f"vault_audit_report_job_{job_id}.xlsx"
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started lazily so importing the app doesn't fork workers
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, audit_result, container_info: dict, bag_durations: dict = None,
+               labels_over_3_days: list = None) -> Optional[str]:
+        """Queue a report; returns the job ID, or None when the queue is full"""
+        self.prune()
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job['future'].done())
+            if pending >= self.max_pending:
+                return None
+
+            job_id = uuid.uuid4().hex
+            future = self._get_executor().submit(
+                run_export_job,
+                self.output_folder,
+                self.job_filename(job_id),
+                audit_result,
+                container_info,
+                bag_durations,
+                labels_over_3_days
+            )
+            job = {
+                'future': future,
+                'created_at': time.time(),
+                'finished_at': None,
+                'download_name': f"vault_audit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            }
+            self._jobs[job_id] = job
+
+        future.add_done_callback(lambda _: self._finished(job))
+        return job_id
+
+    def _finished(self, job: dict):
+        job['finished_at'] = time.time()
+        future = job['future']
+        if self.on_rendered and not future.cancelled() and future.exception() is None:
+            self.on_rendered(future.result()[1])
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Report a job's status.
+
+        Jobs started by another worker process are still found once their
+        file exists in the shared export folder.
+        """
+        if not job_id.isalnum():
+            return None
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            filepath = os.path.join(self.output_folder, self.job_filename(job_id))
+            if os.path.exists(filepath):
+                return {'job_id': job_id, 'status': JOB_DONE, 'filepath': filepath,
+                        'download_name': os.path.basename(filepath)}
+            return None
+
+        future = job['future']
+        status = {'job_id': job_id, 'download_name': job['download_name']}
+
+        if not future.done():
+            status['status'] = JOB_RUNNING if future.running() else JOB_QUEUED
+            return status
+
+        error = future.exception()
+        if error:
+            status['status'] = JOB_FAILED
+            status['error'] = str(error)
+        else:
+            status['status'] = JOB_DONE
+            status['filepath'], _ = future.result()
+        return status
+
+    def prune(self):
+        """Forget finished jobs past the retention window and delete their files"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['future'].done() and (job['finished_at'] or job['created_at']) < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        for job_id in expired:
+            try:
+                os.remove(os.path.join(self.output_folder, self.job_filename(job_id)))
+            except OSError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from modules.models.models import AuditResult
+
+REPORT_PREFIX = 'vault_audit_report_'
+JOB_REPORT_PREFIX = 'vault_audit_report_job_'
+
+
+class ReportCache:
+    """
+    Rendered reports keyed by what went into them.
+
+    Entries are evicted least-recently-used first, both past max_entries and
+    past max_bytes of cached report bodies. The cache also keeps the
+    timestamped files in the export folder from growing without bound.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 64 * 1024 * 1024,
+                 export_folder: str = None, max_export_files: int = 200,
+                 max_export_age_seconds: int = 7 * 24 * 60 * 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.export_folder = export_folder
+        self.max_export_files = max_export_files
+        self.max_export_age_seconds = max_export_age_seconds
+
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(audit_result: AuditResult, *parts) -> str:
+        """
+        Stable key for an audit result plus any extra inputs (DB generation,
+        date, location, format...).
+        """
+        digest = hashlib.sha256()
+        digest.update(str(audit_result.total_scanned).encode())
+        for labels in (audit_result.matched_labels, audit_result.unmatched_labels, audit_result.expected_not_scanned):
+            digest.update(b'\x1e')
+            # LabelIndex iterates in sorted order
+            for label in labels:
+                digest.update(label.encode('utf-8'))
+                digest.update(b'\x1f')
+        for part in parts:
+            digest.update(b'\x1e')
+            digest.update(str(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        """Return (report bytes, download name) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, data: bytes, download_name: str):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._total_bytes -= len(previous[0])
+
+            self._entries[key] = (data, download_name)
+            self._total_bytes += len(data)
+
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def cleanup_exports(self):
+        """Delete old report files beyond the count and age limits (newest are kept)"""
+        if not self.export_folder or not os.path.isdir(self.export_folder):
+            return
+
+        reports = []
+        for name in os.listdir(self.export_folder):
+            # Background job files are owned by ExportJobQueue's retention
+            if not name.startswith(REPORT_PREFIX) or name.startswith(JOB_REPORT_PREFIX) or name.endswith('.part'):
+                continue
+            path = os.path.join(self.export_folder, name)
+            try:
+                reports.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+
+        reports.sort(reverse=True)
+        cutoff = time.time() - self.max_export_age_seconds
+        for index, (mtime, path) in enumerate(reports):
+            if index >= self.max_export_files or mtime < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
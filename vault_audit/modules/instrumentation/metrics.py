@@ -0,0 +1,222 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+from flask import request, Response
+from sqlalchemy import event
+
+# Upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds in queries per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+UNMATCHED_ROUTE = '<unmatched>'
+NO_ROUTE = '<none>'
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter split by label values"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}'
+                for labels, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram split by label values"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: tuple, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = label_names
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(series[0]), series[1], series[2])
+                              for labels, series in self._series.items())
+
+        lines = []
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {count}')
+        return lines
+
+
+class Metrics:
+    """
+    Request, SQL and operation timings exposed in Prometheus text format.
+
+    Created disabled, every hook is skipped and timer() is a no-op, so
+    turning metrics off costs nothing beyond a flag check.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._local = threading.local()
+
+        self.request_duration = Histogram(
+            'vault_http_request_duration_seconds', 'Time to build a response, by route',
+            LATENCY_BUCKETS, ('method', 'route', 'status'))
+        self.request_queries = Histogram(
+            'vault_http_request_sql_queries', 'SQL statements executed per request',
+            QUERY_COUNT_BUCKETS, ('route',))
+        self.sql_queries = Counter(
+            'vault_sql_queries_total', 'SQL statements executed, by route', ('route',))
+        self.sql_seconds = Counter(
+            'vault_sql_seconds_total', 'Time spent executing SQL statements, by route', ('route',))
+        self.operation_duration = Histogram(
+            'vault_operation_duration_seconds', 'Duration of instrumented operations',
+            LATENCY_BUCKETS, ('operation',))
+
+        self._metrics = [self.request_duration, self.request_queries, self.sql_queries,
+                         self.sql_seconds, self.operation_duration]
+
+    def init_app(self, app, endpoint: str = '/metrics', view_decorator=None):
+        """
+        Register request hooks and the metrics endpoint.
+
+        Args:
+            view_decorator: Wraps the endpoint's view, e.g. to require a login
+        """
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        view = view_decorator(self.metrics_view) if view_decorator else self.metrics_view
+        app.add_url_rule(endpoint, 'metrics', view)
+
+    def instrument_engine(self, engine):
+        """Count and time every statement an engine executes"""
+        if not self.enabled:
+            return
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def timer(self, operation: str):
+        """Context manager recording how long the block took under operation"""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(operation)
+
+    def observe(self, operation: str, seconds: float):
+        """Record a duration measured elsewhere, e.g. in a worker process"""
+        if self.enabled:
+            self.operation_duration.observe(seconds, (operation,))
+
+    @contextmanager
+    def _timed(self, operation: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.operation_duration.observe(time.perf_counter() - start, (operation,))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    # ===== REQUEST HOOKS =====
+
+    def _route(self) -> str:
+        rule = getattr(self._local, 'route', None)
+        return rule or NO_ROUTE
+
+    def _before_request(self):
+        self._local.start = time.perf_counter()
+        self._local.route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        self._local.queries = 0
+
+    def _after_request(self, response):
+        start = getattr(self._local, 'start', None)
+        if start is not None:
+            # Streamed bodies (SSE, CSV) are timed up to the first byte, not to completion
+            route = self._route()
+            self.request_duration.observe(time.perf_counter() - start,
+                                          (request.method, route, str(response.status_code)))
+            self.request_queries.observe(self._local.queries, (route,))
+        return response
+
+    def _teardown_request(self, _error=None):
+        self._local.start = None
+        self._local.route = None
+
+    # ===== SQL HOOKS =====
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('vault_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('vault_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        route = (self._route(),)
+        self.sql_queries.inc(route)
+        self.sql_seconds.inc(route, elapsed)
+        if getattr(self._local, 'start', None) is not None:
+            self._local.queries += 1
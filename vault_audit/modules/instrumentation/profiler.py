@@ -0,0 +1,182 @@
+import cProfile
+import hmac
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+PROFILE_HEADER = 'HTTP_X_VAULT_PROFILE'
+PROFILE_MODE_HEADER = 'HTTP_X_VAULT_PROFILE_MODE'
+PROFILE_QUERY_ARG = 'profile'
+PROFILE_MODE_QUERY_ARG = 'profile_mode'
+PROFILE_ID_RESPONSE_HEADER = 'X-Vault-Profile-Id'
+
+MODE_CPROFILE = 'cprofile'
+MODE_PYINSTRUMENT = 'pyinstrument'
+
+# Artifacts are only ever served by these generated names
+PROFILE_NAME_PATTERN = re.compile(r'^[0-9]{8}_[0-9]{6}_[A-Za-z0-9_-]+_[0-9a-f]{8}\.(prof|html)$')
+
+
+def pyinstrument_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ProfiledResponse:
+    """Response body wrapper that stops the profiler once the server closes it"""
+
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._finish()
+
+
+class RequestProfiler:
+    """
+    WSGI middleware that profiles a request on demand.
+
+    A request is profiled only when it carries the admin token in the
+    X-Vault-Profile header or the ?profile= query argument; any other
+    request goes straight to the app after one environ lookup. The
+    profile covers the app call and the response body up to close(), and
+    is saved as a .prof (cProfile) or .html (pyinstrument) file. Only the
+    newest max_profiles files are kept, and one request is profiled at a
+    time.
+    """
+
+    def __init__(self, wsgi_app, profile_dir: str, token: str, max_profiles: int = 20):
+        self.wsgi_app = wsgi_app
+        self.profile_dir = profile_dir
+        self.token = token
+        self.max_profiles = max_profiles
+        self._busy = threading.Lock()
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def __call__(self, environ, start_response):
+        mode = self._requested_mode(environ)
+        if mode is None or not self._busy.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            name = self._profile_name(environ, mode)
+            profiler = self._start(mode)
+        except Exception:
+            self._busy.release()
+            raise
+
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            try:
+                self._stop_and_save(profiler, mode, name)
+            finally:
+                self._busy.release()
+
+        def profiled_start_response(status, headers, exc_info=None):
+            return start_response(status, headers + [(PROFILE_ID_RESPONSE_HEADER, name)], exc_info)
+
+        try:
+            body = self.wsgi_app(environ, profiled_start_response)
+        except Exception:
+            finish()
+            raise
+        return ProfiledResponse(body, finish)
+
+    def _requested_mode(self, environ) -> Optional[str]:
+        supplied = environ.get(PROFILE_HEADER)
+        mode = environ.get(PROFILE_MODE_HEADER)
+
+        query = environ.get('QUERY_STRING', '')
+        if supplied is None and PROFILE_QUERY_ARG in query:
+            args = parse_qs(query)
+            supplied = args.get(PROFILE_QUERY_ARG, [None])[0]
+            mode = mode or args.get(PROFILE_MODE_QUERY_ARG, [None])[0]
+
+        if not supplied or not hmac.compare_digest(supplied.encode(), self.token.encode()):
+            return None
+
+        if (mode or '').lower() == MODE_PYINSTRUMENT and pyinstrument_available():
+            return MODE_PYINSTRUMENT
+        return MODE_CPROFILE
+
+    def _profile_name(self, environ, mode: str) -> str:
+        path = re.sub(r'[^A-Za-z0-9]+', '-', environ.get('PATH_INFO', '')).strip('-')[:40] or 'root'
+        extension = 'html' if mode == MODE_PYINSTRUMENT else 'prof'
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        return f"{timestamp}_{environ.get('REQUEST_METHOD', 'GET')}_{path}_{uuid.uuid4().hex[:8]}.{extension}"
+
+    def _start(self, mode: str):
+        if mode == MODE_PYINSTRUMENT:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_and_save(self, profiler, mode: str, name: str):
+        path = os.path.join(self.profile_dir, name)
+        partial_path = path + '.part'
+
+        if mode == MODE_PYINSTRUMENT:
+            profiler.stop()
+            with open(partial_path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            profiler.dump_stats(partial_path)
+
+        os.replace(partial_path, path)
+        self.prune()
+
+    def prune(self):
+        """Delete the oldest profiles beyond max_profiles"""
+        profiles = self.list_profiles()
+        for profile in profiles[self.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, profile['name']))
+            except OSError:
+                pass
+
+    def list_profiles(self) -> list[dict]:
+        """Saved profiles, newest first"""
+        profiles = []
+        for name in os.listdir(self.profile_dir):
+            if not PROFILE_NAME_PATTERN.match(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.profile_dir, name))
+            except OSError:
+                continue
+            profiles.append({'name': name, 'size': stat.st_size, 'created_at': stat.st_mtime})
+
+        profiles.sort(key=lambda profile: (profile['created_at'], profile['name']), reverse=True)
+        return profiles
+
+    def get_path(self, name: str) -> Optional[str]:
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.profile_dir, name)
+        return path if os.path.exists(path) else None
@@ -0,0 +1,176 @@
+from bisect import bisect_left
+from collections.abc import Set
+from heapq import merge
+from itertools import chain, filterfalse
+from typing import Iterable, Iterator
+
+
+def _restore(sorted_labels: tuple) -> 'LabelIndex':
+    """Unpickle helper; labels are already sorted and unique"""
+    return LabelIndex._from_sorted(sorted_labels)
+
+
+def _dedupe_sorted(labels: Iterable[str]) -> Iterator[str]:
+    previous = None
+    for label in labels:
+        if label != previous:
+            yield label
+            previous = label
+
+
+class LabelIndex(Set):
+    """
+    Immutable, sorted set of labels.
+
+    The labels live in one sorted tuple, about a fifth of the memory of a
+    set of the same labels. Membership is a binary search, O(log n); set
+    operations that probe most of the labels hash them into a frozenset
+    that is dropped afterwards. Iterating yields labels in sorted order
+    without copying.
+
+    Set operations against another LabelIndex or any iterable return a
+    LabelIndex and only sort what the result doesn't inherit in order.
+    """
+    __slots__ = ('_sorted',)
+
+    def __init__(self, labels: Iterable[str] = ()):
+        if isinstance(labels, LabelIndex):
+            self._sorted = labels._sorted
+            return
+        self._sorted = tuple(sorted(set(labels)))
+
+    @classmethod
+    def _from_sorted(cls, sorted_labels: tuple) -> 'LabelIndex':
+        index = cls.__new__(cls)
+        index._sorted = sorted_labels
+        return index
+
+    @classmethod
+    def _from_iterable(cls, labels: Iterable[str]) -> 'LabelIndex':
+        # Used by the Set mixin methods (isdisjoint, ^...)
+        return cls(labels)
+
+    @classmethod
+    def union_of(cls, indexes: Iterable['LabelIndex']) -> 'LabelIndex':
+        return cls(chain.from_iterable(indexes))
+
+    def __contains__(self, label) -> bool:
+        labels = self._sorted
+        try:
+            position = bisect_left(labels, label)
+        except TypeError:
+            # Not comparable with str, so never a label
+            return False
+        return position < len(labels) and labels[position] == label
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sorted)
+
+    def __reversed__(self) -> Iterator[str]:
+        return reversed(self._sorted)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LabelIndex):
+            return self._sorted == other._sorted
+        if isinstance(other, Set):
+            return len(self._sorted) == len(other) and all(label in other for label in self._sorted)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        # Equal to the hash of a frozenset of the same labels, as __eq__ requires
+        return hash(frozenset(self._sorted))
+
+    def __reduce__(self):
+        return _restore, (self._sorted,)
+
+    def __repr__(self) -> str:
+        if len(self._sorted) > 5:
+            return f"LabelIndex({len(self._sorted)} labels: {self._sorted[0]!r} .. {self._sorted[-1]!r})"
+        return f"LabelIndex({list(self._sorted)!r})"
+
+    @property
+    def sorted_labels(self) -> tuple:
+        """The labels in sorted order (no copy)"""
+        return self._sorted
+
+    def _probe(self, count: int):
+        """
+        Membership test for count lookups: binary search for a few, a
+        throwaway frozenset when count is comparable to the index size
+        """
+        if count * 8 < len(self._sorted):
+            return self.__contains__
+        return frozenset(self._sorted).__contains__
+
+    @staticmethod
+    def _lookup_of(labels) -> Set:
+        if isinstance(labels, (LabelIndex, set, frozenset)):
+            return labels
+        return frozenset(labels)
+
+    def intersection(self, labels: Iterable[str]) -> 'LabelIndex':
+        other = self._lookup_of(labels)
+        if len(other) * 8 < len(self._sorted):
+            # Small batch: probe it against the index and sort the few hits;
+            # otherwise filtering the already sorted labels beats sorting
+            return LabelIndex._from_sorted(tuple(sorted(filter(self.__contains__, other))))
+        probe = other._probe(len(self._sorted)) if isinstance(other, LabelIndex) else other.__contains__
+        return LabelIndex._from_sorted(tuple(filter(probe, self._sorted)))
+
+    def difference(self, labels: Iterable[str]) -> 'LabelIndex':
+        """Labels not in labels, still sorted without re-sorting"""
+        other = self._lookup_of(labels)
+        if not other:
+            return self
+        probe = other._probe(len(self._sorted)) if isinstance(other, LabelIndex) else other.__contains__
+        return LabelIndex._from_sorted(tuple(filterfalse(probe, self._sorted)))
+
+    def union(self, labels: Iterable[str]) -> 'LabelIndex':
+        if not self._sorted and isinstance(labels, LabelIndex):
+            return labels
+        other = labels if isinstance(labels, LabelIndex) else LabelIndex(labels)
+        if other <= self:
+            return self
+        return LabelIndex._from_sorted(tuple(_dedupe_sorted(merge(self._sorted, other._sorted))))
+
+    def __and__(self, other) -> 'LabelIndex':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return self.intersection(other)
+
+    __rand__ = __and__
+
+    def __sub__(self, other) -> 'LabelIndex':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return self.difference(other)
+
+    def __rsub__(self, other) -> 'LabelIndex':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        other = self._lookup_of(other)
+        return LabelIndex(filterfalse(self._probe(len(other)), other))
+
+    def __or__(self, other) -> 'LabelIndex':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return self.union(other)
+
+    __ror__ = __or__
+
+    def __le__(self, other) -> bool:
+        if isinstance(other, LabelIndex):
+            return other >= self
+        other = self._lookup_of(other)
+        if len(self._sorted) > len(other):
+            return False
+        return all(map(other.__contains__, self._sorted))
+
+    def __ge__(self, other) -> bool:
+        other = self._lookup_of(other)
+        if len(self._sorted) < len(other):
+            return False
+        return all(map(self._probe(len(other)), other))
@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 from datetime import date
 
+from modules.models.label_index import LabelIndex
+
 
 @dataclass
 class Parameters:
@@ -10,9 +12,10 @@ class Parameters:
     carrier: str
     carrier_location: str
     created_at_date: Optional[date] = None  # Actual date object for import tracking
+    created_at_date_fallback: bool = False  # True when B1 had no date and created_at_date is the parse day
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     origin: str
     destination: str
@@ -28,13 +31,39 @@ class Transaction:
 class ContainerData:
     parameters: Parameters
     location_name: str
-    valid_labels: set[str]
+    valid_labels: LabelIndex
     transactions: list[Transaction]
 
+    @property
+    def containers(self) -> list['ContainerData']:
+        return [self]
+
+
+@dataclass
+class MultiContainerData:
+    """Several holdover files audited as one scan session"""
+    containers: list[ContainerData]
+    # Union of every container's expected labels
+    valid_labels: LabelIndex = field(init=False)
+    # label -> carrier_location of the first container that expects it
+    label_locations: dict[str, str] = field(init=False)
+
+    def __post_init__(self):
+        self.valid_labels = LabelIndex.union_of(container.valid_labels for container in self.containers)
+        self.label_locations = {}
+        for container in self.containers:
+            location = container.parameters.carrier_location
+            for label in container.valid_labels:
+                self.label_locations.setdefault(label, location)
+
+    @property
+    def location_name(self) -> str:
+        return ', '.join(container.location_name for container in self.containers)
+
 
 @dataclass
 class AuditResult:
     total_scanned: int
-    matched_labels: set[str]
-    unmatched_labels: set[str]
-    expected_not_scanned: set[str]
\ No newline at end of file
+    matched_labels: LabelIndex
+    unmatched_labels: LabelIndex
+    expected_not_scanned: LabelIndex
\ No newline at end of file
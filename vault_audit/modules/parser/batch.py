@@ -0,0 +1,122 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.parser.parser import parse_container_workbook
+
+# Limits for one batch upload, zip contents included
+MAX_BATCH_FILES = 50
+MAX_UNZIPPED_BYTES = 256 * 1024 * 1024
+
+
+class BatchUploadError(ValueError):
+    """The upload as a whole can't be processed"""
+
+
+def extract_workbooks(zip_bytes: bytes) -> list[tuple[str, bytes]]:
+    """
+    Read the .xlsx members of a zip archive.
+
+    Folders, macOS resource forks and other file types are skipped, and
+    member names are reduced to their base name.
+
+    Returns:
+        (file name, workbook bytes) pairs in archive order
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(zip_bytes))
+    except zipfile.BadZipFile:
+        raise BatchUploadError('Not a valid zip archive')
+
+    workbooks = []
+    total = 0
+    with archive:
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            if member.is_dir() or not name.endswith('.xlsx') or name.startswith(('.', '~$')) \
+                    or member.filename.startswith('__MACOSX/'):
+                continue
+
+            # Declared sizes are checked before anything is decompressed
+            total += member.file_size
+            if total > MAX_UNZIPPED_BYTES:
+                raise BatchUploadError('Zip archive is too large once extracted')
+            if len(workbooks) >= MAX_BATCH_FILES:
+                raise BatchUploadError(f'At most {MAX_BATCH_FILES} workbooks per upload')
+
+            workbooks.append((name, archive.read(member)))
+
+    return workbooks
+
+
+class BatchParser:
+    """
+    Parses several holdover workbooks at once on a process pool.
+
+    openpyxl parsing is CPU bound, so separate processes scale where
+    threads wouldn't. The pool starts on first use and is reused.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def parse_files(self, file_paths: list[str]) -> list:
+        """
+        Parse every file, keeping going past files that fail.
+
+        Returns:
+            One ContainerData, MultiContainerData or Exception per path,
+            in the same order
+        """
+        if len(file_paths) == 1 or self.max_workers < 2:
+            # One file spreads its location sheets over the pool instead; with
+            # a single worker the pool would only add pickling overhead
+            results = []
+            for path in file_paths:
+                try:
+                    results.append(self.parse_workbook(path))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        executor = self._get_executor()
+        futures = [executor.submit(parse_container_workbook, path) for path in file_paths]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def parse_workbook(self, file_path: str):
+        """
+        Parse one workbook, its location sheets in parallel when it has several.
+
+        Each worker opens its own read-only reader, so the pool only starts
+        for multi-location workbooks.
+        """
+        executor = _LazyExecutor(self) if self.max_workers > 1 else None
+        return parse_container_workbook(file_path, executor=executor)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _LazyExecutor:
+    """Hands submissions to the parser's pool, starting it on first use"""
+
+    def __init__(self, parser: BatchParser):
+        self.parser = parser
+
+    def submit(self, fn, *args, **kwargs):
+        return self.parser._get_executor().submit(fn, *args, **kwargs)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from modules.models.models import ContainerData
+
+
+class ParseCache:
+    """
+    Cache of parsed workbooks keyed by the SHA-256 of the uploaded bytes.
+
+    A small in-process LRU sits in front of an on-disk store of compressed
+    pickles. The disk store is bounded by total size and evicts the least
+    recently used entries first (tracked through file mtimes).
+    """
+
+    FILE_SUFFIX = '.parsed'
+    # Bumped when the pickled models change shape; older files just miss and age out
+    FORMAT_VERSION = 3
+
+    def __init__(self, cache_dir: str, max_memory_entries: int = 8, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.v{self.FORMAT_VERSION}{self.FILE_SUFFIX}")
+
+    def get(self, digest: str) -> Optional[ContainerData]:
+        """Return the cached ContainerData for a digest, or None on a miss"""
+        with self._lock:
+            container_data = self._memory.get(digest)
+            if container_data is not None:
+                self._memory.move_to_end(digest)
+                self.hits += 1
+                return container_data
+
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                container_data = pickle.loads(zlib.decompress(f.read()))
+            os.utime(path)
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError):
+            # Missing, evicted concurrently, or written by an incompatible version
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(digest, container_data)
+        return container_data
+
+    def put(self, digest: str, container_data: ContainerData):
+        """
+        Store parsed data in memory and on disk, then enforce the size bound.
+
+        Workbooks dated by the today() fallback aren't stored: the same bytes
+        uploaded on a later day must get that day's date.
+        """
+        if any(container.parameters.created_at_date_fallback for container in container_data.containers):
+            return
+
+        with self._lock:
+            self._remember(digest, container_data)
+
+        payload = zlib.compress(pickle.dumps(container_data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        path = self._path(digest)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        self._evict_disk()
+
+    def _remember(self, digest: str, container_data: ContainerData):
+        self._memory[digest] = container_data
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_entries(self) -> list:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.FILE_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict_disk(self):
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self) -> dict:
+        entries = self._disk_entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(entries),
+                'disk_bytes': sum(size for _, size, _ in entries),
+                'max_disk_bytes': self.max_disk_bytes
+            }
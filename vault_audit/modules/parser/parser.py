@@ -1,8 +1,19 @@
 import openpyxl
-from modules.models.models import Parameters, Transaction, ContainerData
+from modules.models.models import Parameters, Transaction, ContainerData, MultiContainerData
+from modules.models.label_index import LabelIndex
+from dataclasses import replace
 from datetime import datetime, date
+from typing import Iterable, Iterator
 import re
 
+# Origin, Destination, Type, Departure date, Arrival date, Labels, Count, Value
+ROW_WIDTH = 8
+EMPTY_ROW = (None,) * ROW_WIDTH
+
+# Sheets that never hold location transactions
+PARAMETERS_SHEET = 'Parameters'
+NON_LOCATION_SHEETS = {PARAMETERS_SHEET, 'valid_labels'}
+
 FILTERED_LABELS = {
     "Bags",
     "Labels",
@@ -77,7 +88,8 @@ def parse_parameters(sheet) -> Parameters:
         pass
 
     # Fallback to today's date if parsing failed
-    if not created_at_date_obj:
+    created_at_date_fallback = not created_at_date_obj
+    if created_at_date_fallback:
         created_at_date_obj = date.today()
 
     return Parameters(
@@ -85,28 +97,29 @@ def parse_parameters(sheet) -> Parameters:
         created_by=sheet['B2'].value,
         carrier=sheet['B3'].value,
         carrier_location=carrier_location,
-        created_at_date=created_at_date_obj
+        created_at_date=created_at_date_obj,
+        created_at_date_fallback=created_at_date_fallback
     )
 
 
-def parse_dynamic_sheet(sheet) -> tuple[list[Transaction], set[str]]:
-    transactions = []
-    valid_labels = set()
+def iter_transactions(rows: Iterable[tuple], valid_labels: set[str]) -> Iterator[Transaction]:
+    """
+    Yield transactions from location sheet rows as they are read.
 
+    Args:
+        rows: Value tuples (origin, destination, type, departure, arrival,
+              label, count, value) starting below the header row
+        valid_labels: Set that every non-filtered label is added to
+
+    Yields:
+        Transaction objects in sheet order
+    """
     current_transaction = None
-    current_labels = []
     current_count = 0.0
     current_value = 0.0
 
-    for row_idx in range(2, sheet.max_row + 1):
-        origin = sheet.cell(row_idx, 1).value
-        destination = sheet.cell(row_idx, 2).value
-        trans_type = sheet.cell(row_idx, 3).value
-        departure = sheet.cell(row_idx, 4).value
-        arrival = sheet.cell(row_idx, 5).value
-        label = sheet.cell(row_idx, 6).value
-        count = sheet.cell(row_idx, 7).value
-        value = sheet.cell(row_idx, 8).value
+    for row in rows:
+        origin, destination, trans_type, departure, arrival, label, count, value = (tuple(row) + EMPTY_ROW)[:ROW_WIDTH]
 
         origin_str = str(origin).strip() if origin else ""
         destination_str = str(destination).strip() if destination else ""
@@ -117,15 +130,14 @@ def parse_dynamic_sheet(sheet) -> tuple[list[Transaction], set[str]]:
 
         if is_date_separator:
             if current_transaction:
-                transactions.append(current_transaction)
+                yield _finalize_transaction(current_transaction, current_count, current_value)
                 current_transaction = None
             continue
 
         if is_primary_row:
             if current_transaction:
-                transactions.append(current_transaction)
+                yield _finalize_transaction(current_transaction, current_count, current_value)
 
-            current_labels = []
             current_count = 0.0
             current_value = 0.0
 
@@ -145,38 +157,137 @@ def parse_dynamic_sheet(sheet) -> tuple[list[Transaction], set[str]]:
             if label_str and label_str not in FILTERED_LABELS:
                 valid_labels.add(label_str)
                 if current_transaction:
-                    current_labels.append(label_str)
+                    # Labels accumulate in place; totals are set once at the boundary
+                    current_transaction.labels.append(label_str)
 
         if count:
             current_count += float(count)
         if value:
             current_value += float(value)
 
-        if current_transaction:
-            current_transaction.labels = current_labels[:]
-            current_transaction.total_count = current_count
-            current_transaction.total_value = current_value
-
     if current_transaction:
-        transactions.append(current_transaction)
+        yield _finalize_transaction(current_transaction, current_count, current_value)
 
-    return transactions, valid_labels
 
+def _finalize_transaction(transaction: Transaction, total_count: float, total_value: float) -> Transaction:
+    transaction.total_count = total_count
+    transaction.total_value = total_value
+    return transaction
 
-def parse_container_file(file_path: str) -> ContainerData:
-    wb = openpyxl.load_workbook(file_path, data_only=True)
 
-    params_sheet = wb['Parameters']
-    parameters = parse_parameters(params_sheet)
+def parse_dynamic_sheet(sheet) -> tuple[list[Transaction], LabelIndex]:
+    valid_labels = set()
+    rows = sheet.iter_rows(min_row=2, max_col=ROW_WIDTH, values_only=True)
+    transactions = list(iter_transactions(rows, valid_labels))
+    return transactions, LabelIndex(valid_labels)
+
 
-    location_sheet_name = wb.sheetnames[1]
-    location_sheet = wb[location_sheet_name]
+def parse_container_file(file_path: str, streaming: bool = True) -> ContainerData:
+    """
+    Parse a container holdover workbook.
 
-    transactions, valid_labels = parse_dynamic_sheet(location_sheet)
+    Args:
+        file_path: Path to the .xlsx file
+        streaming: Read rows through openpyxl's read-only mode instead of
+                   loading the whole workbook object graph into memory
+
+    Returns:
+        ContainerData for the first location sheet
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=streaming, data_only=True)
+    try:
+        params_sheet = wb[PARAMETERS_SHEET]
+        parameters = parse_parameters(params_sheet)
+
+        location_sheet_name = location_sheet_names(wb.sheetnames)[0]
+        location_sheet = wb[location_sheet_name]
+
+        transactions, valid_labels = parse_dynamic_sheet(location_sheet)
+    finally:
+        wb.close()
 
     return ContainerData(
         parameters=parameters,
         location_name=location_sheet_name,
         valid_labels=valid_labels,
         transactions=transactions
-    )
\ No newline at end of file
+    )
+
+
+def location_sheet_names(sheet_names: list[str]) -> list[str]:
+    """Data sheets after Parameters, in workbook order"""
+    start = sheet_names.index(PARAMETERS_SHEET) + 1 if PARAMETERS_SHEET in sheet_names else 0
+    return [name for name in sheet_names[start:] if name not in NON_LOCATION_SHEETS]
+
+
+def parse_location_sheet(file_path: str, sheet_name: str, parameters: Parameters,
+                         streaming: bool = True) -> ContainerData:
+    """
+    Parse a single location sheet on its own.
+
+    Opens its own reader so sheets of one workbook can be parsed in
+    separate processes.
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=streaming, data_only=True)
+    try:
+        transactions, valid_labels = parse_dynamic_sheet(wb[sheet_name])
+    finally:
+        wb.close()
+
+    return ContainerData(
+        parameters=parameters,
+        location_name=sheet_name,
+        valid_labels=valid_labels,
+        transactions=transactions
+    )
+
+
+def parse_container_workbook(file_path: str, streaming: bool = True,
+                             executor=None) -> ContainerData | MultiContainerData:
+    """
+    Parse every location sheet of a container holdover workbook.
+
+    With several location sheets each one becomes its own container whose
+    carrier location is the sheet name; Parameters is shared otherwise.
+
+    Args:
+        file_path: Path to the .xlsx file
+        streaming: Read rows through openpyxl's read-only mode
+        executor: Optional concurrent.futures executor to parse sheets on
+
+    Returns:
+        ContainerData for a single location sheet, MultiContainerData otherwise
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=streaming, data_only=True)
+    try:
+        parameters = parse_parameters(wb[PARAMETERS_SHEET])
+        sheet_names = location_sheet_names(wb.sheetnames)
+        if not sheet_names:
+            raise ValueError('Workbook has no location sheets')
+
+        if len(sheet_names) == 1 or executor is None:
+            containers = []
+            for sheet_name in sheet_names:
+                transactions, valid_labels = parse_dynamic_sheet(wb[sheet_name])
+                containers.append(ContainerData(
+                    parameters=parameters,
+                    location_name=sheet_name,
+                    valid_labels=valid_labels,
+                    transactions=transactions
+                ))
+    finally:
+        wb.close()
+
+    if len(sheet_names) == 1:
+        return containers[0]
+
+    if executor is not None:
+        futures = [
+            executor.submit(parse_location_sheet, file_path, sheet_name, parameters, streaming)
+            for sheet_name in sheet_names
+        ]
+        containers = [future.result() for future in futures]
+
+    for container in containers:
+        container.parameters = replace(parameters, carrier_location=container.location_name)
+    return MultiContainerData(containers)
@@ -0,0 +1,583 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from modules.models.models import ContainerData, MultiContainerData, AuditResult
+from modules.auditor.auditor import VaultAuditor, SCAN_MATCHED, SCAN_UNMATCHED, SCAN_DUPLICATE, scan_counters
+
+
+@dataclass
+class AuditSession:
+    """Everything one audit needs between /upload, /audit and /export"""
+    audit_id: str
+    container_data: ContainerData | MultiContainerData
+    auditor: VaultAuditor
+    last_audit_result: Optional[AuditResult] = None
+    created_at: float = field(default_factory=time.time)
+
+
+def new_audit_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _dumps(container_data) -> bytes:
+    return zlib.compress(pickle.dumps(container_data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def _loads(payload: bytes):
+    return pickle.loads(zlib.decompress(payload))
+
+
+def _clean_labels(labels: list[str]) -> list[str]:
+    return [label for label in (label.strip() for label in labels) if label]
+
+
+def _replay(audit_id: str, container_data, labels: list[str], completed: Optional[int],
+            created_at: float, auditor_factory: Callable = VaultAuditor) -> AuditSession:
+    """
+    Rebuild an audit session from its scans in order.
+
+    Args:
+        labels: Every scan of the audit, duplicates included
+        completed: How many leading scans the last completed audit covered,
+                   None if the audit was never completed
+        auditor_factory: Builds the VaultAuditor for container_data
+    """
+    auditor = auditor_factory(container_data)
+    last_audit_result = None
+    if completed is None:
+        auditor.load(labels)
+    else:
+        auditor.load(labels[:completed])
+        last_audit_result = auditor.finalize()
+        for label in labels[completed:]:
+            auditor.scan(label)
+    # Scans up to the last completed audit are already in the database
+    auditor.pending_scans = auditor.pending_scans[completed or 0:]
+    return AuditSession(audit_id, container_data, auditor, last_audit_result, created_at)
+
+
+class _ContainerCache:
+    """Parsed containers by digest; they never change once stored"""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str):
+        with self._lock:
+            container_data = self._entries.get(digest)
+            if container_data is not None:
+                self._entries.move_to_end(digest)
+            return container_data
+
+    def put(self, digest: str, container_data):
+        with self._lock:
+            self._entries[digest] = container_data
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class MemorySessionStore:
+    """
+    In-process LRU with TTL.
+
+    Only visible to the worker process that created the session, so it
+    suits a single worker (the default `python app.py` setup).
+    """
+
+    def __init__(self, max_sessions: int = 64, ttl_seconds: int = 12 * 60 * 60):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, audit_id: str) -> Optional[AuditSession]:
+        with self._lock:
+            entry = self._sessions.get(audit_id)
+            if entry is None:
+                return None
+            expires_at, audit_session = entry
+            if expires_at < time.time():
+                del self._sessions[audit_id]
+                return None
+            self._sessions[audit_id] = (time.time() + self.ttl_seconds, audit_session)
+            self._sessions.move_to_end(audit_id)
+            return audit_session
+
+    def put(self, audit_session: AuditSession):
+        with self._lock:
+            self._sessions[audit_session.audit_id] = (time.time() + self.ttl_seconds, audit_session)
+            self._sessions.move_to_end(audit_session.audit_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def scan(self, audit_id: str, label: str) -> Optional[tuple[Optional[str], dict]]:
+        audit_session = self.get(audit_id)
+        if audit_session is None:
+            return None
+        auditor = audit_session.auditor
+        with auditor.lock:
+            return auditor.scan(label), auditor.get_counters()
+
+    def counters(self, audit_id: str) -> Optional[dict]:
+        audit_session = self.get(audit_id)
+        return audit_session.auditor.get_counters() if audit_session else None
+
+    def complete(self, audit_id: str, scanned_labels: Optional[list[str]] = None) \
+            -> Optional[tuple[AuditSession, AuditResult, list[str]]]:
+        audit_session = self.get(audit_id)
+        if audit_session is None:
+            return None
+        with audit_session.auditor.lock:
+            result, pending_scans = audit_session.auditor.complete(scanned_labels)
+            audit_session.last_audit_result = result
+        return audit_session, result, pending_scans
+
+    def delete(self, audit_id: str):
+        with self._lock:
+            self._sessions.pop(audit_id, None)
+
+
+class SqliteSessionStore:
+    """
+    Sessions kept in a local SQLite file.
+
+    Shared by every worker process on the host, which makes it the simple
+    choice for gunicorn with several workers. The parsed container is
+    written once per distinct workbook; each scan is one row inserted in
+    a write transaction, so concurrent scans are serialized, never lost.
+    """
+
+    # Seconds between the expiry updates reads make; a read itself never takes the write lock
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, db_path: str, ttl_seconds: int = 12 * 60 * 60, auditor_factory: Callable = VaultAuditor):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.auditor_factory = auditor_factory
+        self._containers = _ContainerCache()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+        with self._transaction() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(audit_sessions)")]
+            if 'payload' in columns:
+                # Sessions from before scans were stored per row; they are short lived
+                conn.execute("DROP TABLE audit_sessions")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_containers ("
+                "digest TEXT PRIMARY KEY, payload BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_sessions ("
+                "audit_id TEXT PRIMARY KEY, container_digest TEXT NOT NULL, "
+                "expected_count INTEGER NOT NULL, scanned_count INTEGER NOT NULL DEFAULT 0, "
+                "matched_count INTEGER NOT NULL DEFAULT 0, completed_seq INTEGER, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_scans ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, audit_id TEXT NOT NULL, label TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_audit_scans_audit_label ON audit_scans (audit_id, label)")
+
+    @contextmanager
+    def _transaction(self, write: bool = True):
+        """
+        Connection inside a transaction, committed on success.
+
+        Writes take the write lock up front (BEGIN IMMEDIATE); reads stay
+        deferred so they run alongside writers on other workers under WAL.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _session_row(self, conn, audit_id: str, touch: bool = True):
+        """
+        The live session's row, ending with its expires_at.
+
+        Args:
+            touch: Slide the expiry forward; only inside a write transaction
+        """
+        now = time.time()
+        row = conn.execute(
+            "SELECT container_digest, expected_count, scanned_count, matched_count, completed_seq, created_at, "
+            "expires_at FROM audit_sessions WHERE audit_id = ? AND expires_at >= ?",
+            (audit_id, now)
+        ).fetchone()
+        if row is not None and touch:
+            conn.execute("UPDATE audit_sessions SET expires_at = ? WHERE audit_id = ?",
+                         (now + self.ttl_seconds, audit_id))
+        return row
+
+    def _touch_after_read(self, audit_id: str, expires_at: float):
+        """Slide a session's expiry after a read, in a write of its own at most every TOUCH_INTERVAL"""
+        expires_at_now = time.time() + self.ttl_seconds
+        if expires_at_now - expires_at < self.TOUCH_INTERVAL:
+            return
+        with self._transaction() as conn:
+            conn.execute("UPDATE audit_sessions SET expires_at = ? WHERE audit_id = ? AND expires_at < ?",
+                         (expires_at_now, audit_id, expires_at_now))
+
+    def _container(self, conn, digest: str):
+        container_data = self._containers.get(digest)
+        if container_data is None:
+            row = conn.execute("SELECT payload FROM audit_containers WHERE digest = ?", (digest,)).fetchone()
+            container_data = _loads(row[0])
+            self._containers.put(digest, container_data)
+        return container_data
+
+    def get(self, audit_id: str) -> Optional[AuditSession]:
+        with self._transaction(write=False) as conn:
+            row = self._session_row(conn, audit_id, touch=False)
+            if row is None:
+                return None
+            digest, _, _, _, completed_seq, created_at, expires_at = row
+            container_data = self._container(conn, digest)
+            scans = conn.execute(
+                "SELECT seq, label FROM audit_scans WHERE audit_id = ? ORDER BY seq", (audit_id,)
+            ).fetchall()
+        self._touch_after_read(audit_id, expires_at)
+
+        completed = None
+        if completed_seq is not None:
+            completed = sum(1 for seq, _ in scans if seq <= completed_seq)
+        return _replay(audit_id, container_data, [label for _, label in scans], completed, created_at,
+                       self.auditor_factory)
+
+    def put(self, audit_session: AuditSession):
+        """Register a new audit; its scans are written by scan() and complete()"""
+        payload = _dumps(audit_session.container_data)
+        digest = hashlib.sha256(payload).hexdigest()
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO audit_containers (digest, payload) VALUES (?, ?)", (digest, payload))
+            conn.execute("DELETE FROM audit_scans WHERE audit_id = ?", (audit_session.audit_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO audit_sessions "
+                "(audit_id, container_digest, expected_count, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (audit_session.audit_id, digest, len(audit_session.container_data.valid_labels),
+                 audit_session.created_at, now + self.ttl_seconds)
+            )
+            self._purge_expired(conn, now)
+        self._containers.put(digest, audit_session.container_data)
+
+    def _purge_expired(self, conn, now: float):
+        conn.execute(
+            "DELETE FROM audit_scans WHERE audit_id IN "
+            "(SELECT audit_id FROM audit_sessions WHERE expires_at < ?)", (now,)
+        )
+        conn.execute("DELETE FROM audit_sessions WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM audit_containers WHERE digest NOT IN "
+            "(SELECT container_digest FROM audit_sessions)"
+        )
+
+    def scan(self, audit_id: str, label: str) -> Optional[tuple[Optional[str], dict]]:
+        label = label.strip()
+        with self._transaction() as conn:
+            row = self._session_row(conn, audit_id)
+            if row is None:
+                return None
+            digest, expected_count, scanned_count, matched_count, _, _, _ = row
+            if not label:
+                return None, scan_counters(expected_count, scanned_count, matched_count)
+
+            duplicate = conn.execute(
+                "SELECT 1 FROM audit_scans WHERE audit_id = ? AND label = ? LIMIT 1", (audit_id, label)
+            ).fetchone()
+            conn.execute("INSERT INTO audit_scans (audit_id, label) VALUES (?, ?)", (audit_id, label))
+
+            if duplicate:
+                status = SCAN_DUPLICATE
+            else:
+                scanned_count += 1
+                if label in self._container(conn, digest).valid_labels:
+                    matched_count += 1
+                    status = SCAN_MATCHED
+                else:
+                    status = SCAN_UNMATCHED
+                conn.execute(
+                    "UPDATE audit_sessions SET scanned_count = ?, matched_count = ? WHERE audit_id = ?",
+                    (scanned_count, matched_count, audit_id)
+                )
+
+        return status, scan_counters(expected_count, scanned_count, matched_count)
+
+    def counters(self, audit_id: str) -> Optional[dict]:
+        with self._transaction(write=False) as conn:
+            row = self._session_row(conn, audit_id, touch=False)
+        if row is None:
+            return None
+        self._touch_after_read(audit_id, row[6])
+        return scan_counters(*row[1:4])
+
+    def complete(self, audit_id: str, scanned_labels: Optional[list[str]] = None) \
+            -> Optional[tuple[AuditSession, AuditResult, list[str]]]:
+        """
+        Finalize the audit in one write transaction.
+
+        Args:
+            scanned_labels: The complete scan list, replacing the stored scans;
+                            None finalizes the scans stored through scan()
+
+        Returns:
+            (AuditSession, AuditResult, scans not yet written to the database),
+            or None if the audit doesn't exist
+        """
+        with self._transaction() as conn:
+            row = self._session_row(conn, audit_id)
+            if row is None:
+                return None
+            digest, _, _, _, completed_seq, created_at, _ = row
+            container_data = self._container(conn, digest)
+
+            if scanned_labels is not None:
+                conn.execute("DELETE FROM audit_scans WHERE audit_id = ?", (audit_id,))
+                conn.executemany(
+                    "INSERT INTO audit_scans (audit_id, label) VALUES (?, ?)",
+                    [(audit_id, label) for label in _clean_labels(scanned_labels)]
+                )
+            scans = conn.execute(
+                "SELECT seq, label FROM audit_scans WHERE audit_id = ? ORDER BY seq", (audit_id,)
+            ).fetchall()
+
+            # Replaced scans get new sequence numbers, so they are all pending
+            completed = sum(1 for seq, _ in scans if completed_seq is not None and seq <= completed_seq)
+            audit_session = _replay(audit_id, container_data, [label for _, label in scans], None, created_at,
+                                    self.auditor_factory)
+            pending_scans = audit_session.auditor.drain_pending_scans()[completed:]
+            result = audit_session.auditor.finalize()
+            audit_session.last_audit_result = result
+
+            conn.execute(
+                "UPDATE audit_sessions SET scanned_count = ?, matched_count = ?, completed_seq = ? "
+                "WHERE audit_id = ?",
+                (len(audit_session.auditor.scanned_labels), len(audit_session.auditor.matched_labels),
+                 scans[-1][0] if scans else 0, audit_id)
+            )
+
+        return audit_session, result, pending_scans
+
+    def delete(self, audit_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM audit_scans WHERE audit_id = ?", (audit_id,))
+            conn.execute("DELETE FROM audit_sessions WHERE audit_id = ?", (audit_id,))
+
+
+class RedisSessionStore:
+    """
+    Sessions kept in Redis or any server speaking its protocol.
+
+    Needs the optional `redis` package; expiry is left to the server.
+    The parsed container is stored once per distinct workbook; scans are
+    appended to a list and added to scanned/matched sets in one MULTI, so
+    concurrent scans from several workers are never lost.
+    """
+
+    KEY_PREFIX = 'vault_audit:session:'
+    CONTAINER_PREFIX = 'vault_audit:container:'
+
+    def __init__(self, url: str, ttl_seconds: int = 12 * 60 * 60, auditor_factory: Callable = VaultAuditor):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis session store needs the 'redis' package (pip install redis)") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.auditor_factory = auditor_factory
+        self._containers = _ContainerCache()
+
+    def _keys(self, audit_id: str) -> tuple[str, str, str, str]:
+        key = self.KEY_PREFIX + audit_id
+        return key, key + ':scans', key + ':scanned', key + ':matched'
+
+    def _touch(self, audit_id: str, digest: str):
+        with self.client.pipeline(transaction=False) as pipe:
+            for key in (*self._keys(audit_id), self.CONTAINER_PREFIX + digest):
+                pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+
+    def _meta(self, audit_id: str) -> Optional[dict]:
+        meta = self.client.hgetall(self._keys(audit_id)[0])
+        if not meta:
+            return None
+        meta = {key.decode(): value.decode() for key, value in meta.items()}
+        self._touch(audit_id, meta['digest'])
+        return meta
+
+    def _container(self, digest: str):
+        container_data = self._containers.get(digest)
+        if container_data is None:
+            payload = self.client.get(self.CONTAINER_PREFIX + digest)
+            if payload is None:
+                return None
+            container_data = _loads(payload)
+            self._containers.put(digest, container_data)
+        return container_data
+
+    def get(self, audit_id: str) -> Optional[AuditSession]:
+        meta = self._meta(audit_id)
+        if meta is None:
+            return None
+        container_data = self._container(meta['digest'])
+        if container_data is None:
+            return None
+
+        labels = [label.decode() for label in self.client.lrange(self._keys(audit_id)[1], 0, -1)]
+        completed = int(meta['completed']) if 'completed' in meta else None
+        return _replay(audit_id, container_data, labels, completed, float(meta['created_at']), self.auditor_factory)
+
+    def put(self, audit_session: AuditSession):
+        """Register a new audit; its scans are written by scan() and complete()"""
+        payload = _dumps(audit_session.container_data)
+        digest = hashlib.sha256(payload).hexdigest()
+        key, *scan_keys = self._keys(audit_session.audit_id)
+        with self.client.pipeline() as pipe:
+            pipe.set(self.CONTAINER_PREFIX + digest, payload, ex=self.ttl_seconds)
+            pipe.delete(key, *scan_keys)
+            pipe.hset(key, mapping={
+                'digest': digest,
+                'expected_count': len(audit_session.container_data.valid_labels),
+                'created_at': audit_session.created_at
+            })
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        self._containers.put(digest, audit_session.container_data)
+
+    def scan(self, audit_id: str, label: str) -> Optional[tuple[Optional[str], dict]]:
+        meta = self._meta(audit_id)
+        if meta is None:
+            return None
+        container_data = self._container(meta['digest'])
+        if container_data is None:
+            return None
+
+        _, scans_key, scanned_key, matched_key = self._keys(audit_id)
+        label = label.strip()
+        expected = label in container_data.valid_labels
+        with self.client.pipeline() as pipe:
+            if label:
+                pipe.sadd(scanned_key, label)
+                pipe.rpush(scans_key, label)
+                if expected:
+                    pipe.sadd(matched_key, label)
+            pipe.scard(scanned_key)
+            pipe.scard(matched_key)
+            replies = pipe.execute()
+
+        *_, scanned_count, matched_count = replies
+        counters = scan_counters(int(meta['expected_count']), scanned_count, matched_count)
+        if not label:
+            return None, counters
+        if not replies[0]:
+            return SCAN_DUPLICATE, counters
+        return (SCAN_MATCHED if expected else SCAN_UNMATCHED), counters
+
+    def counters(self, audit_id: str) -> Optional[dict]:
+        meta = self._meta(audit_id)
+        if meta is None:
+            return None
+        _, _, scanned_key, matched_key = self._keys(audit_id)
+        with self.client.pipeline() as pipe:
+            scanned_count, matched_count = pipe.scard(scanned_key).scard(matched_key).execute()
+        return scan_counters(int(meta['expected_count']), scanned_count, matched_count)
+
+    def complete(self, audit_id: str, scanned_labels: Optional[list[str]] = None) \
+            -> Optional[tuple[AuditSession, AuditResult, list[str]]]:
+        """
+        Finalize the audit atomically; retried if a scan lands meanwhile.
+
+        Args:
+            scanned_labels: The complete scan list, replacing the stored scans;
+                            None finalizes the scans stored through scan()
+
+        Returns:
+            (AuditSession, AuditResult, scans not yet written to the database),
+            or None if the audit doesn't exist
+        """
+        meta = self._meta(audit_id)
+        if meta is None:
+            return None
+        container_data = self._container(meta['digest'])
+        if container_data is None:
+            return None
+
+        key, scans_key, scanned_key, matched_key = self._keys(audit_id)
+        valid_labels = container_data.valid_labels
+
+        def complete_scans(pipe):
+            labels = [label.decode() for label in pipe.lrange(scans_key, 0, -1)]
+            completed = int(pipe.hget(key, 'completed') or 0)
+            pipe.multi()
+            if scanned_labels is not None:
+                labels = _clean_labels(scanned_labels)
+                completed = 0
+                pipe.delete(scans_key, scanned_key, matched_key)
+                if labels:
+                    pipe.rpush(scans_key, *labels)
+                    pipe.sadd(scanned_key, *labels)
+                    matched = [label for label in labels if label in valid_labels]
+                    if matched:
+                        pipe.sadd(matched_key, *matched)
+                for scan_key in (scans_key, scanned_key, matched_key):
+                    pipe.expire(scan_key, self.ttl_seconds)
+            pipe.hset(key, 'completed', len(labels))
+            return labels, completed
+
+        labels, completed = self.client.transaction(complete_scans, scans_key, value_from_callable=True)
+
+        audit_session = _replay(audit_id, container_data, labels, None, float(meta['created_at']),
+                                self.auditor_factory)
+        pending_scans = audit_session.auditor.drain_pending_scans()[completed:]
+        result = audit_session.auditor.finalize()
+        audit_session.last_audit_result = result
+        return audit_session, result, pending_scans
+
+    def delete(self, audit_id: str):
+        self.client.delete(*self._keys(audit_id))
+
+
+def create_session_store(url: str = 'memory://', ttl_seconds: int = 12 * 60 * 60,
+                         auditor_factory: Callable = VaultAuditor):
+    """
+    Build a session store from a URL.
+
+    Args:
+        url: memory:// | sqlite:///path/to/sessions.db | redis://host:port/db
+        ttl_seconds: Idle time after which a session is dropped
+        auditor_factory: Builds the VaultAuditor when a shared store rebuilds
+                         a session from its scans
+    """
+    if url.startswith('memory://'):
+        return MemorySessionStore(ttl_seconds=ttl_seconds)
+    if url.startswith('sqlite:///'):
+        return SqliteSessionStore(url[len('sqlite:///'):], ttl_seconds=ttl_seconds, auditor_factory=auditor_factory)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore(url, ttl_seconds=ttl_seconds, auditor_factory=auditor_factory)
+    raise ValueError(f"Unsupported session store URL: {url}")
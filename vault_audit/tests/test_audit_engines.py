@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.bench_audit import same_result, synthetic_audit
+from modules.auditor.auditor import VaultAuditor, ENGINE_AUTO, ENGINE_NUMPY, ENGINE_PYTHON
+
+pytest.importorskip('numpy')
+
+
+@pytest.fixture(scope='module')
+def audit_input():
+    return synthetic_audit(2000)
+
+
+def test_engines_give_identical_results(audit_input):
+    container_data, scanned = audit_input
+    assert same_result(VaultAuditor(container_data, engine=ENGINE_PYTHON).audit(scanned),
+                       VaultAuditor(container_data, engine=ENGINE_NUMPY).audit(scanned))
+
+
+def test_numpy_engine_completes_a_posted_scan_list(audit_input):
+    container_data, scanned = audit_input
+    python_auditor = VaultAuditor(container_data, engine=ENGINE_PYTHON)
+    numpy_auditor = VaultAuditor(container_data, engine=ENGINE_NUMPY)
+
+    python_result, python_pending = python_auditor.complete(scanned)
+    numpy_result, numpy_pending = numpy_auditor.complete(scanned)
+    assert same_result(python_result, numpy_result)
+    assert numpy_pending == python_pending
+    assert numpy_auditor.get_counters() == python_auditor.get_counters()
+
+    # Scans after a bulk load are classified as usual
+    assert numpy_auditor.scan(scanned[0]) == python_auditor.scan(scanned[0])
+
+
+def test_auto_engine_switches_at_the_threshold(audit_input):
+    container_data, scanned = audit_input
+    assert VaultAuditor(container_data).select_engine(len(scanned)) == ENGINE_PYTHON
+    threshold = len(container_data.valid_labels) + len(scanned)
+    auditor = VaultAuditor(container_data, engine=ENGINE_AUTO, vectorized_min_labels=threshold)
+    assert auditor.select_engine(len(scanned)) == ENGINE_NUMPY
+    assert auditor.select_engine(0) == ENGINE_PYTHON
@@ -0,0 +1,52 @@
+import queue
+
+import pytest
+
+from modules.events.broadcaster import AuditBroadcaster, RedisAuditBroadcaster, create_broadcaster
+
+
+def test_in_process_fan_out():
+    broadcaster = AuditBroadcaster()
+    first, second = broadcaster.subscribe('a1'), broadcaster.subscribe('a1')
+    other = broadcaster.subscribe('a2')
+
+    broadcaster.publish('a1', 'scan', {'label': 'L1'})
+
+    assert first.get_nowait() == ('scan', {'label': 'L1'})
+    assert second.get_nowait() == ('scan', {'label': 'L1'})
+    assert other.empty()
+
+
+def test_subscriber_limit():
+    broadcaster = AuditBroadcaster(max_subscribers=1)
+    subscription = broadcaster.subscribe('a1')
+    assert broadcaster.subscribe('a2') is None
+
+    broadcaster.unsubscribe('a1', subscription)
+    broadcaster.unsubscribe('a1', subscription)
+    assert broadcaster.subscribe('a2') is not None
+
+
+def test_sqlite_store_has_no_broadcaster():
+    assert isinstance(create_broadcaster('memory://'), AuditBroadcaster)
+    assert create_broadcaster('sqlite:////tmp/sessions.db') is None
+
+
+def test_redis_relays_events_between_workers():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('redis')
+    server = fakeredis.FakeServer()
+
+    def worker():
+        broadcaster = RedisAuditBroadcaster('redis://localhost:6379/0')
+        broadcaster.client = fakeredis.FakeRedis(server=server)
+        return broadcaster
+
+    scanning, streaming = worker(), worker()
+    subscription = streaming.subscribe('a1')
+
+    scanning.publish('a1', 'scan', {'label': 'L1'})
+
+    assert subscription.get(timeout=5) == ('scan', {'label': 'L1'})
+    with pytest.raises(queue.Empty):
+        subscription.get(timeout=0.2)
@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from modules.auditor.auditor import VaultAuditor
+from modules.export.formats import EXPORTERS, AuditReport, get_exporter
+from modules.models.label_index import LabelIndex
+from modules.models.models import ContainerData, Parameters
+
+
+@pytest.fixture(scope='module')
+def report():
+    container_data = ContainerData(
+        parameters=Parameters(created_at='', created_by='', carrier='', carrier_location='Test'),
+        location_name='Test',
+        valid_labels=LabelIndex(['A', 'B', 'C']),
+        transactions=[]
+    )
+    audit_result = VaultAuditor(container_data).audit(['A', 'X'])
+    return AuditReport(audit_result, {'location': 'Test', 'created_at': ''})
+
+
+@pytest.mark.parametrize('name', sorted(EXPORTERS))
+def test_every_format_renders_through_iter_chunks(name, report):
+    exporter = get_exporter(name)
+    body = b''.join(exporter.iter_chunks(report))
+    assert body
+    assert exporter.download_name().endswith('.' + exporter.extension)
+
+
+def test_xlsx_body_is_a_workbook(report):
+    body = b''.join(get_exporter('xlsx').iter_chunks(report))
+    assert load_workbook(io.BytesIO(body), read_only=True).sheetnames
+
+
+def test_text_formats_list_the_same_labels(report):
+    rows = list(csv.DictReader(io.StringIO(b''.join(get_exporter('csv').iter_chunks(report)).decode())))
+    records = [json.loads(line) for line in b''.join(get_exporter('ndjson').iter_chunks(report)).splitlines()]
+    for section in ('unmatched', 'not_scanned'):
+        assert [row['item'] for row in rows if row['section'] == section] == \
+            [record['label_id'] for record in records if record['type'] == section]
+    assert [row['item'] for row in rows if row['section'] == 'not_scanned'] == ['B', 'C']
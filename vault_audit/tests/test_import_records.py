@@ -0,0 +1,13 @@
+from datetime import date
+
+from modules.database.db_manager import DatabaseManager
+
+
+def test_same_day_imports_keep_their_own_labels(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / 'vault.db'))
+    db_manager.record_import(date(2025, 9, 24), 'Sioux Falls', ['B', 'A'])
+    db_manager.record_import(date(2025, 9, 24), 'Sioux Falls', ['C'])
+
+    records = sorted(db_manager.get_all_import_records(), key=lambda record: record['id'])
+    assert [record['labels'] for record in records] == [['B', 'A'], ['C']]
+    assert [record['total_labels'] for record in records] == [2, 1]
@@ -0,0 +1,36 @@
+import pickle
+import tracemalloc
+
+from modules.models.label_index import LabelIndex
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, not counting its temporaries"""
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def test_set_operations_stay_sorted():
+    index = LabelIndex(['C', 'A', 'B', 'A'])
+    assert list(index) == ['A', 'B', 'C']
+    assert 'B' in index and 'D' not in index and 1 not in index
+    assert list(index - {'B'}) == ['A', 'C']
+    assert list(index & {'C', 'A', 'Z'}) == ['A', 'C']
+    assert list(index | {'D', 'A'}) == ['A', 'B', 'C', 'D']
+    assert list({'Z', 'A'} - index) == ['Z']
+    assert index == {'A', 'B', 'C'} and hash(index) == hash(frozenset('ABC'))
+    assert LabelIndex('AB') <= index and index >= {'A'}
+    assert pickle.loads(pickle.dumps(index)) == index
+
+
+def test_uses_less_memory_than_a_set():
+    labels = [f'DG{number:08d}' for number in range(100_000)]
+    index_bytes = retained_bytes(lambda: LabelIndex(labels))
+    set_bytes = retained_bytes(lambda: set(labels))
+    assert index_bytes < set_bytes / 3
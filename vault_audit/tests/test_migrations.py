@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, func, text
+from sqlalchemy.engine import make_url
+
+from modules.database.db_manager import DatabaseManager
+from modules.database.dialects import COPY_MIN_ROWS, supports_copy
+from modules.database.migrations import MIGRATIONS, migrate
+from modules.database.models import Base, ImportRecordLabel, LabelImportDate, LabelImportHistory, SchemaMigration
+
+ALL_VERSIONS = [version for version, _, _ in MIGRATIONS]
+
+# PostgreSQL server to create throwaway databases on, e.g.
+# postgresql+psycopg2://postgres@localhost/postgres; those tests skip without it
+POSTGRES_URL = os.environ.get('VAULT_TEST_DATABASE_URL')
+
+# The schema create_all built before migrations existed
+LEGACY_SQLITE_SCHEMA = """
+CREATE TABLE bag_records (
+    id INTEGER NOT NULL, label_id VARCHAR NOT NULL, first_scan_datetime DATETIME NOT NULL,
+    carrier_location VARCHAR NOT NULL, scan_count INTEGER, last_scan_datetime DATETIME,
+    created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_bag_records_label_id ON bag_records (label_id);
+CREATE TABLE location_trackers (
+    id INTEGER NOT NULL, carrier_location VARCHAR NOT NULL, first_scan_date DATE NOT NULL,
+    last_scan_date DATE NOT NULL, total_days_tracked INTEGER, total_unique_bags INTEGER,
+    total_scans INTEGER, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_location_trackers_carrier_location ON location_trackers (carrier_location);
+CREATE TABLE import_records (
+    id INTEGER NOT NULL, import_date DATE NOT NULL, carrier_location VARCHAR NOT NULL,
+    total_labels INTEGER, labels_json TEXT NOT NULL, created_at DATETIME, PRIMARY KEY (id)
+);
+CREATE INDEX ix_import_records_import_date ON import_records (import_date);
+CREATE INDEX ix_import_records_carrier_location ON import_records (carrier_location);
+CREATE TABLE label_import_history (
+    id INTEGER NOT NULL, label_id VARCHAR NOT NULL, carrier_location VARCHAR NOT NULL,
+    first_import_date DATE NOT NULL, last_import_date DATE NOT NULL, import_count INTEGER,
+    import_dates_json TEXT NOT NULL, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id)
+);
+CREATE INDEX ix_label_import_history_carrier_location ON label_import_history (carrier_location);
+CREATE INDEX ix_label_import_history_label_id ON label_import_history (label_id);
+"""
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def database_url(request, tmp_path):
+    if request.param == 'sqlite':
+        yield f"sqlite:///{tmp_path / 'vault.db'}"
+        return
+
+    if not POSTGRES_URL:
+        pytest.skip('VAULT_TEST_DATABASE_URL is not set')
+    server = create_engine(POSTGRES_URL, isolation_level='AUTOCOMMIT')
+    name = f"vault_test_{uuid.uuid4().hex[:8]}"
+    with server.connect() as connection:
+        connection.exec_driver_sql(f"CREATE DATABASE {name}")
+    try:
+        yield make_url(POSTGRES_URL).set(database=name).render_as_string(hide_password=False)
+    finally:
+        with server.connect() as connection:
+            connection.exec_driver_sql(f"DROP DATABASE {name} WITH (FORCE)")
+        server.dispose()
+
+
+def create_legacy_database(path: str):
+    today = date.today()
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executescript(LEGACY_SQLITE_SCHEMA)
+        connection.execute(
+            "INSERT INTO import_records (import_date, carrier_location, total_labels, labels_json) "
+            "VALUES (?, 'Sioux Falls', 2, ?), (?, 'Sioux Falls', 1, ?)",
+            (str(today - timedelta(days=5)), json.dumps(['B', 'A']), str(today - timedelta(days=5)), json.dumps(['C']))
+        )
+        connection.execute(
+            "INSERT INTO label_import_history (label_id, carrier_location, first_import_date, last_import_date, "
+            "import_count, import_dates_json) VALUES ('A', 'Sioux Falls', ?, ?, 2, ?)",
+            (str(today - timedelta(days=5)), str(today), json.dumps([str(today - timedelta(days=5)), str(today)]))
+        )
+    connection.close()
+
+
+def test_fresh_database_matches_models(database_url):
+    engine = create_engine(database_url)
+    assert migrate(engine) == ALL_VERSIONS
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        assert columns == {column.name for column in table.columns}, table.name
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes, table.name
+    engine.dispose()
+
+
+def test_migrate_twice_is_a_no_op(database_url):
+    engine = create_engine(database_url)
+    migrate(engine)
+    assert migrate(engine) == []
+    with engine.connect() as connection:
+        assert connection.execute(select(SchemaMigration.version).order_by(SchemaMigration.version)) \
+            .scalars().all() == ALL_VERSIONS
+    engine.dispose()
+
+
+def test_upgrade_legacy_sqlite_database(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    create_legacy_database(path)
+
+    db_manager = DatabaseManager(path)
+
+    with db_manager.engine.connect() as connection:
+        versions = connection.execute(select(SchemaMigration.version)).scalars().all()
+    assert sorted(versions) == ALL_VERSIONS
+
+    records = sorted(db_manager.get_all_import_records(), key=lambda record: record['id'])
+    assert [record['labels'] for record in records] == [['B', 'A'], ['C']]
+
+    history = db_manager.get_label_import_history('A', 'Sioux Falls')
+    assert history['import_dates'] == [str(date.today() - timedelta(days=5)), str(date.today())]
+    assert [label['label_id'] for label in db_manager.get_labels_over_3_days('Sioux Falls')] == ['A']
+
+    indexes = {index['name'] for index in inspect(db_manager.engine).get_indexes('label_import_history')}
+    assert 'ux_label_import_history_label_location' in indexes
+
+    # The upgraded schema takes new imports
+    db_manager.record_import(date.today(), 'Sioux Falls', ['A', 'D'])
+    assert db_manager.get_label_import_history('A', 'Sioux Falls')['import_count'] == 2
+    db_manager.engine.dispose()
+
+
+def test_upgrade_merges_duplicate_histories(tmp_path):
+    # The legacy schema allowed several history rows per label and location
+    path = str(tmp_path / 'legacy.db')
+    create_legacy_database(path)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute(
+            "INSERT INTO label_import_history (label_id, carrier_location, first_import_date, last_import_date, "
+            "import_count, import_dates_json) VALUES ('A', 'Sioux Falls', '2025-01-02', '2025-01-03', 2, ?)",
+            (json.dumps(['2025-01-02', '2025-01-03']),)
+        )
+    connection.close()
+
+    db_manager = DatabaseManager(path)
+
+    with db_manager.engine.connect() as connection:
+        rows = connection.execute(select(LabelImportHistory).where(LabelImportHistory.label_id == 'A')).all()
+    assert len(rows) == 1
+    assert str(rows[0].first_import_date) == '2025-01-02'
+    assert rows[0].last_import_date == date.today()
+    assert rows[0].import_count == 4
+    assert db_manager.get_label_import_history('A', 'Sioux Falls')['import_dates'][:2] == ['2025-01-02', '2025-01-03']
+    db_manager.engine.dispose()
+
+
+def test_sqlite_migrations_are_safe_to_run_twice(tmp_path):
+    # SQLite has no advisory lock, so two workers may both run a migration
+    path = str(tmp_path / 'legacy.db')
+    create_legacy_database(path)
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+
+    def counts():
+        with engine.connect() as connection:
+            return [connection.execute(select(func.count()).select_from(model)).scalar()
+                    for model in (LabelImportDate, ImportRecordLabel, LabelImportHistory)]
+
+    before = counts()
+    with engine.begin() as connection:
+        connection.execute(SchemaMigration.__table__.delete())
+    assert migrate(engine) == ALL_VERSIONS
+    assert counts() == before
+    engine.dispose()
+
+
+def test_concurrent_migrations_apply_each_version_once(database_url):
+    if not database_url.startswith('postgresql'):
+        pytest.skip('Only PostgreSQL serializes migrations with an advisory lock')
+
+    engines = [create_engine(database_url) for _ in range(4)]
+    applied, errors = [], []
+
+    def run(engine):
+        try:
+            applied.extend(migrate(engine))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(engine,)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(applied) == ALL_VERSIONS
+    for engine in engines:
+        engine.dispose()
+
+
+def test_large_import_round_trips(database_url):
+    # On PostgreSQL a batch this size goes through COPY
+    db_manager = DatabaseManager(database_url)
+    labels = [f'{index:020d}' for index in range(COPY_MIN_ROWS + 10)]
+    with db_manager.engine.connect() as connection:
+        uses_copy = supports_copy(connection)
+    assert uses_copy == database_url.startswith('postgresql')
+
+    first = db_manager.record_import(date.today() - timedelta(days=4), 'Sioux Falls', labels)
+    second = db_manager.record_import(date.today(), 'Sioux Falls', labels[:10])
+
+    assert first['new_labels_count'] == len(labels)
+    assert second['updated_labels_count'] == 10
+    assert second['labels_over_3_days_count'] == 10
+
+    records = sorted(db_manager.get_all_import_records(), key=lambda record: record['id'])
+    assert [record['labels'] for record in records] == [labels, labels[:10]]
+    with db_manager.engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(LabelImportHistory)).scalar() == len(labels)
+        assert connection.execute(text("SELECT count(*) FROM label_import_dates")).scalar() == len(labels) + 10
+    db_manager.engine.dispose()
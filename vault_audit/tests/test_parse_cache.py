@@ -0,0 +1,37 @@
+from datetime import date
+
+import openpyxl
+
+from benchmarks.workbook import generate_container_workbook
+from modules.parser.parse_cache import ParseCache
+from modules.parser.parser import parse_container_file
+
+
+def test_caches_parsed_workbooks(tmp_path):
+    path = str(tmp_path / 'holdover.xlsx')
+    generate_container_workbook(path, labels=20)
+    container_data = parse_container_file(path)
+    assert not container_data.parameters.created_at_date_fallback
+
+    cache = ParseCache(str(tmp_path / 'cache'))
+    cache.put('digest', container_data)
+    # A fresh cache only has the disk copy
+    cached = ParseCache(str(tmp_path / 'cache')).get('digest')
+    assert cached.parameters.created_at_date == date(2025, 9, 24)
+
+
+def test_skips_workbooks_dated_by_the_fallback(tmp_path):
+    path = str(tmp_path / 'holdover.xlsx')
+    generate_container_workbook(path, labels=20)
+    workbook = openpyxl.load_workbook(path)
+    workbook['Parameters']['B1'] = 'not a date'
+    workbook.save(path)
+
+    container_data = parse_container_file(path)
+    assert container_data.parameters.created_at_date_fallback
+    assert container_data.parameters.created_at_date == date.today()
+
+    cache = ParseCache(str(tmp_path / 'cache'))
+    cache.put('digest', container_data)
+    assert cache.get('digest') is None
+    assert ParseCache(str(tmp_path / 'cache')).get('digest') is None
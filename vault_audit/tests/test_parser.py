@@ -0,0 +1,68 @@
+import os
+from dataclasses import asdict
+from datetime import date
+
+import pytest
+
+from benchmarks.workbook import generate_container_workbook
+from modules.parser.parser import parse_container_file, parse_container_workbook
+
+HOLDOVER_WORKBOOK = os.path.join(os.path.dirname(__file__), '..', '..', 'container-holdover.xlsx')
+
+
+@pytest.fixture(scope='module')
+def holdover():
+    """container-holdover.xlsx parsed streaming and fully loaded"""
+    return parse_container_file(HOLDOVER_WORKBOOK, streaming=True), \
+        parse_container_file(HOLDOVER_WORKBOOK, streaming=False)
+
+
+def test_streaming_matches_full_load(holdover):
+    streamed, loaded = holdover
+    assert streamed.parameters == loaded.parameters
+    assert streamed.location_name == loaded.location_name
+    assert streamed.valid_labels.sorted_labels == loaded.valid_labels.sorted_labels
+    assert [asdict(transaction) for transaction in streamed.transactions] == \
+        [asdict(transaction) for transaction in loaded.transactions]
+
+
+def test_holdover_contents(holdover):
+    container_data, _ = holdover
+    assert container_data.parameters.carrier == 'Rochester Armored Car'
+    assert container_data.parameters.carrier_location == 'Sioux Falls'
+    assert container_data.parameters.created_at_date == date(2025, 9, 24)
+    assert len(container_data.valid_labels) == 365
+
+    transactions = container_data.transactions
+    assert len(transactions) == 412
+    assert asdict(transactions[0]) == {
+        'origin': 'WELLS FARGO BANK : Wells Fargo Bank EFF Virtual Vault Rapid City',
+        'destination': 'WELLS FARGO BANK : Wells Fargo Vault Branch Omaha',
+        'type': 'Cash bag',
+        'departure_date': '2025-09-23',
+        'arrival_date': '2025-09-24',
+        'labels': ['DG61136438'],
+        'total_count': 1.0,
+        'total_value': 415094.0
+    }
+    # Every valid label belongs to exactly one transaction
+    labels = [label for transaction in transactions for label in transaction.labels]
+    assert sorted(labels) == list(container_data.valid_labels)
+    assert sum(transaction.total_count for transaction in transactions) == 1510
+    assert sum(transaction.total_value for transaction in transactions) == pytest.approx(43207249.82)
+
+
+def test_synthetic_workbook_parity(tmp_path):
+    path = str(tmp_path / 'holdover.xlsx')
+    valid_labels = generate_container_workbook(path, labels=500)
+
+    streamed = parse_container_file(path, streaming=True)
+    loaded = parse_container_file(path, streaming=False)
+    assert list(streamed.valid_labels) == sorted(valid_labels)
+    assert [asdict(transaction) for transaction in streamed.transactions] == \
+        [asdict(transaction) for transaction in loaded.transactions]
+
+    # The single-sheet workbook parses to the same container through the multi-sheet entry point
+    workbook = parse_container_workbook(path)
+    assert [asdict(transaction) for transaction in workbook.transactions] == \
+        [asdict(transaction) for transaction in streamed.transactions]
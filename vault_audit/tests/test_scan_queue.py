@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from modules.database.scan_queue import ScanWriteQueue, DURABILITY_ASYNC, DURABILITY_SYNC, CLAIM_STALE_SECONDS
+
+
+class FlakyDatabase:
+    """record_scans stand-in failing its first `failures` calls"""
+
+    class Session:
+        @staticmethod
+        def remove():
+            pass
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.committed = []
+
+    def record_scans(self, labels, carrier_location):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database is locked')
+        self.committed.extend((label, carrier_location) for label in labels)
+        return {label: {'label_id': label} for label in labels}
+
+
+def make_queue(db, tmp_path, durability=DURABILITY_ASYNC, retries=2):
+    return ScanWriteQueue(db, durability=durability, flush_interval=0, retry_delays=(0,) * retries,
+                          failed_path=str(tmp_path / 'failed_scans.jsonl'))
+
+
+def test_async_batch_is_retried(tmp_path):
+    db = FlakyDatabase(failures=2)
+    scan_queue = make_queue(db, tmp_path)
+
+    ticket = scan_queue.submit(['L1', 'L2'], 'Sioux Falls')
+    assert ticket.wait(5)
+    scan_queue.close()
+
+    assert ticket.error is None
+    assert db.committed == [('L1', 'Sioux Falls'), ('L2', 'Sioux Falls')]
+    stats = scan_queue.stats()
+    assert stats['retried_batches'] == 2
+    assert stats['failed_scans'] == 0
+    assert stats['last_error'] is None
+
+
+def test_async_failure_is_kept_and_requeued(tmp_path):
+    scan_queue = make_queue(FlakyDatabase(failures=3), tmp_path)
+    scan_queue.submit(['L1', 'L2'], 'Sioux Falls').wait(5)
+    scan_queue.close()
+
+    stats = scan_queue.stats()
+    assert stats['failed_scans'] == 2
+    assert stats['dead_lettered_scans'] == 2
+    assert 'database is locked' in stats['last_error']
+    with open(tmp_path / 'failed_scans.jsonl') as f:
+        assert [json.loads(line) for line in f] == [{'carrier_location': 'Sioux Falls', 'labels': ['L1', 'L2']}]
+
+    # The next queue on the same file commits them
+    db = FlakyDatabase()
+    scan_queue = make_queue(db, tmp_path)
+    assert scan_queue.flush(5)
+    scan_queue.close()
+    assert db.committed == [('L1', 'Sioux Falls'), ('L2', 'Sioux Falls')]
+    assert scan_queue.stats()['requeued_scans'] == 2
+    # Replay files are gone once their scans committed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_requeue_skips_torn_lines(tmp_path):
+    with open(tmp_path / 'failed_scans.jsonl', 'w') as f:
+        f.write(json.dumps({'carrier_location': 'Sioux Falls', 'labels': ['L1']}) + '\n')
+        f.write('{"carrier_location": "Sioux')
+
+    db = FlakyDatabase()
+    scan_queue = make_queue(db, tmp_path)
+    assert scan_queue.flush(5)
+    scan_queue.close()
+    assert db.committed == [('L1', 'Sioux Falls')]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_requeue_recovers_abandoned_replays_only(tmp_path):
+    abandoned = tmp_path / 'failed_scans.jsonl.1234-1.0'
+    in_progress = tmp_path / 'failed_scans.jsonl.5678-1.0'
+    for path, label in ((abandoned, 'L1'), (in_progress, 'L2')):
+        path.write_text(json.dumps({'carrier_location': 'Sioux Falls', 'labels': [label]}) + '\n')
+    stale = time.time() - CLAIM_STALE_SECONDS - 1
+    os.utime(abandoned, (stale, stale))
+
+    db = FlakyDatabase()
+    scan_queue = make_queue(db, tmp_path)
+    assert scan_queue.flush(5)
+    scan_queue.close()
+    assert db.committed == [('L1', 'Sioux Falls')]
+    assert list(tmp_path.iterdir()) == [in_progress]
+
+
+def test_replay_is_kept_until_committed(tmp_path):
+    (tmp_path / 'failed_scans.jsonl').write_text(json.dumps({'carrier_location': 'Sioux Falls', 'labels': ['L1']}) + '\n')
+    release = threading.Event()
+
+    class BlockedDatabase(FlakyDatabase):
+        def record_scans(self, labels, carrier_location):
+            release.wait(5)
+            return super().record_scans(labels, carrier_location)
+
+    db = BlockedDatabase()
+    scan_queue = make_queue(db, tmp_path)
+    # Claimed but not yet committed: a crash now must not lose the scans
+    [claimed] = tmp_path.iterdir()
+    assert claimed.name.startswith('failed_scans.jsonl.')
+
+    release.set()
+    assert scan_queue.flush(5)
+    scan_queue.close()
+    assert db.committed == [('L1', 'Sioux Falls')]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replay_failing_again_goes_back_to_failed_path(tmp_path):
+    (tmp_path / 'failed_scans.jsonl').write_text(json.dumps({'carrier_location': 'Sioux Falls', 'labels': ['L1']}) + '\n')
+
+    # Fails every retry, so the scans are saved anew before the replay file is removed
+    scan_queue = make_queue(FlakyDatabase(failures=3), tmp_path)
+    scan_queue.flush(5)
+    scan_queue.close()
+    assert [path.name for path in tmp_path.iterdir()] == ['failed_scans.jsonl']
+
+
+def test_sync_failure_is_raised_without_retry(tmp_path):
+    db = FlakyDatabase(failures=1)
+    scan_queue = make_queue(db, tmp_path, durability=DURABILITY_SYNC)
+
+    with pytest.raises(RuntimeError):
+        scan_queue.submit(['L1'], 'Sioux Falls')
+    scan_queue.close()
+
+    assert scan_queue.stats()['retried_batches'] == 0
+    assert not (tmp_path / 'failed_scans.jsonl').exists()
@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from modules.auditor.auditor import VaultAuditor, SCAN_MATCHED, SCAN_UNMATCHED, SCAN_DUPLICATE
+from modules.models.label_index import LabelIndex
+from modules.models.models import ContainerData, Parameters
+from modules.session.store import (
+    AuditSession, MemorySessionStore, SqliteSessionStore, RedisSessionStore, new_audit_id
+)
+
+LABELS = [f'L{i:04d}' for i in range(20)]
+
+
+def make_container() -> ContainerData:
+    return ContainerData(
+        parameters=Parameters(created_at='', created_by='', carrier='', carrier_location='Test'),
+        location_name='Test',
+        valid_labels=LabelIndex(LABELS),
+        transactions=[]
+    )
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store_factory(request, tmp_path):
+    """Builds store instances sharing one backend, like several worker processes"""
+    if request.param == 'memory':
+        store = MemorySessionStore()
+        return lambda: store
+    if request.param == 'sqlite':
+        return lambda: SqliteSessionStore(str(tmp_path / 'sessions.db'))
+
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('redis')
+    server = fakeredis.FakeServer()
+
+    def redis_store():
+        store = RedisSessionStore('redis://localhost:6379/0')
+        store.client = fakeredis.FakeRedis(server=server)
+        return store
+    return redis_store
+
+
+def new_session(store) -> str:
+    container_data = make_container()
+    audit_session = AuditSession(new_audit_id(), container_data, VaultAuditor(container_data))
+    store.put(audit_session)
+    return audit_session.audit_id
+
+
+def test_scan_statuses_and_counters(store_factory):
+    store = store_factory()
+    audit_id = new_session(store)
+
+    assert store.scan(audit_id, LABELS[0])[0] == SCAN_MATCHED
+    assert store.scan(audit_id, f' {LABELS[0]} ')[0] == SCAN_DUPLICATE
+    status, counters = store.scan(audit_id, 'TYPO')
+    assert status == SCAN_UNMATCHED
+    assert counters == {
+        'total_containers_in_onsite': 20,
+        'total_scanned': 2,
+        'matched_count': 1,
+        'unmatched_count': 1,
+        'not_scanned_count': 19
+    }
+    assert store.counters(audit_id) == counters
+    assert store.scan('missing', LABELS[0]) is None
+
+
+def test_posted_labels_replace_earlier_scans(store_factory):
+    store = store_factory()
+    audit_id = new_session(store)
+
+    _, result, pending = store.complete(audit_id, [LABELS[0], 'TYPO'])
+    assert sorted(pending) == [LABELS[0], 'TYPO']
+
+    _, result, pending = store.complete(audit_id, [LABELS[0]])
+    assert result.total_scanned == 1
+    assert list(result.unmatched_labels) == []
+    assert pending == [LABELS[0]]
+
+
+def test_complete_drains_only_new_scans(store_factory):
+    store = store_factory()
+    audit_id = new_session(store)
+
+    store.scan(audit_id, LABELS[0])
+    store.scan(audit_id, LABELS[0])
+    _, result, pending = store.complete(audit_id)
+    assert pending == [LABELS[0], LABELS[0]]
+    assert list(result.matched_labels) == [LABELS[0]]
+
+    store.scan(audit_id, LABELS[1])
+    _, result, pending = store.complete(audit_id)
+    assert pending == [LABELS[1]]
+    assert list(result.matched_labels) == LABELS[:2]
+
+    # A later scan doesn't change the result the export uses
+    store.scan(audit_id, LABELS[2])
+    audit_session = store_factory().get(audit_id)
+    assert list(audit_session.last_audit_result.matched_labels) == LABELS[:2]
+    assert audit_session.auditor.pending_scans == [LABELS[2]]
+
+
+def test_concurrent_scans_are_not_lost(store_factory):
+    audit_id = new_session(store_factory())
+    stores = [store_factory() for _ in range(2)]
+
+    def scan_half(store, labels):
+        for label in labels:
+            store.scan(audit_id, label)
+
+    threads = [
+        threading.Thread(target=scan_half, args=(stores[0], LABELS[0::2] + ['X1'])),
+        threading.Thread(target=scan_half, args=(stores[1], LABELS[1::2] + ['X2']))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counters = stores[0].counters(audit_id)
+    assert counters['matched_count'] == 20
+    assert counters['unmatched_count'] == 2
+    _, result, pending = stores[1].complete(audit_id)
+    assert len(pending) == 22
+    assert result.total_scanned == 22
+
+
+def test_sqlite_reads_do_not_wait_for_writers(tmp_path):
+    db_path = str(tmp_path / 'sessions.db')
+    store = SqliteSessionStore(db_path)
+    audit_id = new_session(store)
+    store.scan(audit_id, LABELS[0])
+    reader = SqliteSessionStore(db_path)
+
+    # Another worker mid-write holds the write lock; reads must not queue behind it
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.monotonic()
+        assert reader.counters(audit_id)['matched_count'] == 1
+        assert reader.get(audit_id).auditor.scanned_labels == {LABELS[0]}
+        assert time.monotonic() - start < 5
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()